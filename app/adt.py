@@ -20,4 +20,51 @@ class CircularList:
             self._index = self._max_index
         else:
             self._index -= 1
-        return self._lst[self._index]
\ No newline at end of file
+        return self._lst[self._index]
+
+class LruCache:
+    def __init__(self, capacity) -> None:
+        """
+        Bounded mapping, which evicts the least recently used item
+        when it's full. It's intended for small capacities, the usage
+        order is kept in a plain list.
+        """
+
+        if capacity < 1:
+            raise ValueError
+        self._capacity = capacity
+        self._items = {}
+        self._order = []
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        if self._order[-1] != key:
+            self._order.remove(key)
+            self._order.append(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        if key in self._items:
+            self._order.remove(key)
+        elif len(self._items) >= self._capacity:
+            del self._items[self._order.pop(0)]
+
+        self._items[key] = value
+        self._order.append(key)
+
+    def clear(self):
+        self._items = {}
+        self._order = []
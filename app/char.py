@@ -2,39 +2,61 @@
 
 from app.line import HorizontalLine, VerticalLine
 
+import app.constants as const
+
+import framebuf
+
 class Char:
+	__slots__ = ("hlines", "vlines", "width", "advance", "_bitmap")
+
+	WIDTH = const.COLS_IN_MATRIX
+	HEIGHT = const.ROWS_IN_MATRIX * const.MATRIXES_IN_COL
+
+	# Empty columns after the ink of a char, when laid out in a text
+	SPACING = 2
+
 	def __init__(self, hlines: list[HorizontalLine], vlines: list[VerticalLine]):
 		"""
 		Represents a digit defined by horizontal and vertical lines
 		spreading out on top matrix and bottom matrix (2 framebuffers).
+		The lines are rasterized into a bitmap on the first use,
+		then the char is rendered by a single blit of the bitmap.
+		The char is never modified after that, so one instance
+		is shared by all the renders.
+		The width is measured from the left edge of the char
+		to the right edge of its ink.
 		"""
 
 		self.hlines = hlines
 		self.vlines = vlines
 
-	def x_shift(self, x_offset: int):
-		for line in self.hlines:
-			line.x_shift(x_offset)
+		self.width = 0
+		for line in hlines:
+			self.width = max(self.width, line.x + line.width)
+		for line in vlines:
+			self.width = max(self.width, line.x + 1)
+		self.advance = self.width + Char.SPACING
+
+		self._bitmap = None
 
-		for line in self.vlines:
-			line.x_shift(x_offset)
-		
-	def deepcopy(self):
-		hlines = []
-		vlines = []
+	def bitmap(self):
+		"""
+		Get the char rasterized into a MONO_HLSB framebuffer.
+		"""
 
-		for line in self.hlines:
-			hlines.append(line.copy())
+		if self._bitmap is None:
+			self._bitmap = framebuf.FrameBuffer(
+				bytearray(Char.WIDTH * Char.HEIGHT // const.ONE_BYTE),
+				Char.WIDTH, Char.HEIGHT, framebuf.MONO_HLSB)
 
-		for line in self.vlines:
-			vlines.append(line.copy())
+			for line in self.hlines:
+				line.render(self._bitmap)
 
-		return Char(hlines, vlines)
+			for line in self.vlines:
+				line.render(self._bitmap)
 
-	def render(self, framebuf):
-		for line in self.hlines:
-			line.render(framebuf)
+		return self._bitmap
 
-		for line in self.vlines:
-			line.render(framebuf)
-			
\ No newline at end of file
+	def render(self, framebuf, x_offset=0, y_offset=0):
+		# Key 0 keeps the pixels around the char untouched
+		framebuf.blit(self.bitmap(), x_offset, y_offset, 0)
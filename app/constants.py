@@ -53,6 +53,16 @@ MIN_BRIGHTNESS = 0X00
 MAX_BRIGHTNESS = 0X0F
 ROW0 = 0x01
 
+########################
+# Display refresh
+########################
+# Period of re-sending the registers and the shown frame to the matrixes
+DISPLAY_REFRESH_PERIOD_MS = 5000
+
+# Brightness fade
+FADE_DURATION_MS = 400
+FADE_STEP_MS = 20
+
 ########################
 # SPI & UART
 ########################
@@ -71,6 +81,10 @@ RTC_DATE_IDX = 2
 RTC_MONTH_IDX = 1
 RTC_HOURS_IDX = 4
 RTC_MINUTES_IDX = 5
+RTC_SECONDS_IDX = 6
+
+# The RTC is read at most once per this period
+RTC_PULL_PERIOD_MS = 1000
 
 ########################
 # Pins
@@ -87,6 +101,30 @@ DISPLAY_SPI_MOSI_PIN = 15
 
 RECV_PIN = 28
 
+########################
+# Text
+########################
+# Advance of the chars missing in a font, e.g. the space
+SPACE_ADVANCE = 4
+TEXT_LAYOUT_CACHE_SIZE = 8
+
+########################
+# Score
+########################
+# Number of rendered score frames kept for reuse
+SCORE_FRAME_CACHE_SIZE = 16
+
+########################
+# Viewer
+########################
+# Target frame rate of scrolling, 1 point per frame
+SCROLL_FPS = 100
+# How long each info is shown when alternating
+ALTERNATE_PERIOD_MS = 2000
+# Name of the transition between the alternated infos, see
+# app/transition.py, None for a hard cut
+ALTERNATE_TRANSITION = "wipe_left"
+
 ########################
 # Halves & quarters
 ########################
@@ -94,6 +132,10 @@ LEFT = 1
 RIGHT = 2
 LEFT_AND_RIGHT = 3
 
+# Names of the display zones of the left and right half
+LEFT_ZONE = "left"
+RIGHT_ZONE = "right"
+
 TOP_ROW = 1
 BOTTOM_ROW = 2
 
@@ -122,6 +164,12 @@ SCORE_CMD_PREFIX = "SCORE="
 PERSIST_CONFIG_CMD_PREFIX = "PERSIST_CONFIG="
 SET_ALL_LEDS_ON_CMD_PREFIX = "SET_ALL_LEDS_ON="
 DISCONNECT_CMD = "DISCONNECT"
+BATCH_CMD_PREFIX = "BATCH="
+BATCH_CMD_DELIMITER = ";"
+BATCH_ACK_CMD = "BATCH_ACK"
+BATCH_NACK_CMD = "BATCH_NACK"
+BINARY_MODE_CMD_PREFIX = "BINARY_MODE="
+BINARY_MODE_ACK_CMD = "BINARY_MODE_ACK"
 
 AT_DISCONNECT_CMD = "AT+DISC"
 # CONFIG_BRIGHTNESS_CMD_PREFIX = "CFG_BRIGHT="
@@ -132,12 +180,57 @@ AT_DISCONNECT_CMD = "AT+DISC"
 
 CR = 13
 LF = 10
+# Range of the printable ASCII characters, which the commands start by
+ASCII_PRINTABLE_MIN = 0x20
+ASCII_PRINTABLE_MAX = 0x7E
+
+# Binary protocol frame: sync, opcode, payload length, payload, checksum.
+# The checksum is XOR of the opcode, length and payload bytes.
+# The multi-byte fields are little-endian.
+BIN_SYNC = 0xA5
+BIN_MAX_PAYLOAD_LEN = 16
+# A frame has to be received completely within this time from its sync
+# byte, i.e. about 20 bytes at 9600 baud with a margin for the BLE link
+BIN_FRAME_TIMEOUT_MS = 100
+
+# Opcodes of the binary protocol
+BIN_SET_SCORE = 0x01
+BIN_SET_TIME = 0x02
+BIN_SET_BRIGHT = 0x03
+BIN_SET_FLAGS = 0x04
+BIN_GET_SCORE = 0x05
+BIN_GET_CONFIG = 0x06
+BIN_SCORE = 0x81
+BIN_CONFIG = 0x86
+BIN_NACK = 0x7E
+BIN_ACK = 0x7F
+
+# Payload formats: left, right, timestamp in ms
+BIN_SCORE_FMT = "<BBQ"
+# year, month, day, weekday, hour, minute, second
+BIN_TIME_FMT = "<HBBBBBB"
+BIN_BRIGHT_FMT = "<B"
+BIN_FLAGS_FMT = "<B"
+# flags, brightness level
+BIN_CONFIG_FMT = "<BB"
+# acknowledged opcode
+BIN_ACK_FMT = "<B"
+BIN_NO_PAYLOAD_FMT = "<"
+
+# Bits of the flags field
+BIN_FLAG_SHOW_SCORE = 0x01
+BIN_FLAG_SHOW_TIME = 0x02
+BIN_FLAG_SCROLL = 0x04
 
 ########################
 # Date & time
 ########################
 DEC_BASE = 10
 MILLENIUM = 2000
+SECONDS_IN_MINUTE = 60
+SECONDS_IN_HOUR = 3600
+SECONDS_IN_DAY = 86400
+DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
 
 ########################
 # Filesystem
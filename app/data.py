@@ -6,6 +6,9 @@ class Score:
         self.right = right
 
 class Config:
+    # Values which change what the viewer renders
+    RENDER_KEYS = ("use_score", "use_time", "scroll")
+
     def __init__(self, use_score: bool, use_time: bool,
         scroll: bool, bright_lvl: int) -> None:
         self.use_score = use_score
@@ -13,5 +16,35 @@ class Config:
         self.scroll = scroll
         self.bright_lvl = bright_lvl
 
+        # Moves on every change of the RENDER_KEYS values, so the viewer
+        # can tell whether it needs to apply them again. The brightness
+        # is applied right away, so it doesn't move it. It isn't persisted.
+        self.generation = 0
+
+    def update(self, **values) -> bool:
+        """
+        Change the config values. Return True, if any of them really changed.
+        """
+
+        changed = False
+        render_changed = False
+        for (key, value) in values.items():
+            if getattr(self, key) != value:
+                setattr(self, key, value)
+                changed = True
+                render_changed |= key in self.RENDER_KEYS
+
+        if render_changed:
+            self.generation += 1
+        return changed
+
+    def to_dict(self) -> dict:
+        return {
+            "use_score": self.use_score,
+            "use_time": self.use_time,
+            "scroll": self.scroll,
+            "bright_lvl": self.bright_lvl
+        }
+
     def __str__(self) -> str:
-        return str(self.__dict__)
+        return str(self.to_dict())
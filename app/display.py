@@ -1,12 +1,23 @@
 # Author: Marek Jankech
 
-from machine import Pin, SPI
-from utime import sleep_ms
+from utime import sleep_ms, ticks_ms, ticks_diff
 
+import uasyncio as asyncio
 import app.constants as const
+from app.transport import Transport
 
 import framebuf
 
+def linear(progress):
+	return progress
+
+def ease_in_out(progress):
+	"""Quadratic easing, slow at the start and at the end."""
+
+	if progress < 0.5:
+		return 2 * progress * progress
+	return 1 - 2 * (1 - progress) * (1 - progress)
+
 class Matrix:
 	WIDTH = const.MATRIXES_IN_ROW * const.COLS_IN_MATRIX
 	HEIGHT = const.MATRIXES_IN_COL * const.ROWS_IN_MATRIX
@@ -14,16 +25,55 @@ class Matrix:
 	HALF_HEIGHT = const.ROWS_IN_MATRIX
 	BOTTOM_HALF_OFFSET = const.MATRIXES_IN_ROW * const.ROWS_IN_MATRIX
 
-	def __init__(self, spi: SPI, cs_pin: Pin, bright_lvl):
+	def __init__(self, transport: Transport, bright_lvl):
 		"""
 		Provides operations for showing patterns on the matrix display.
+		Drawing goes to the off-screen (back) buffer. It's shown on the display
+		only by :func:`present`, which copies it to the front buffer
+		and pushes that one to the matrixes through the transport.
 		"""
-		self.spi = spi
-		self.cs_pin = cs_pin
+		self.transport = transport
 
+		# Back buffer
 		self.buffer = bytearray(
 			const.ROWS_IN_MATRIX * const.MATRIXES_IN_ROW * const.MATRIXES_IN_COL)
 
+		# Front buffer, the frame being shown
+		self._front = bytearray(len(self.buffer))
+
+		# Frames handed over to the writer task
+		self._frame_gen = 0
+		self._frame_ready = asyncio.Event()
+
+		# Precomputed CS frames of the register commands
+		self._packets = {}
+		self._cmd_buf = bytearray(2 * const.CASCADED_MATRIXES)
+
+		# Register state restored by the periodic refresh
+		self._bright_lvl = bright_lvl
+		self._is_on = True
+
+		# Running brightness fade
+		self._fade_task = None
+		self._fade_target = None
+
+		# One CS frame: register and data pair for each of the cascaded chips.
+		# Preallocated, so the redraw doesn't allocate anything.
+		self._row_buf = bytearray(2 * const.CASCADED_MATRIXES)
+
+		# Copy of the last frame pushed to the chips. Only the rows which
+		# differ from it are sent on the next redraw.
+		self._shadow = bytearray(len(self.buffer))
+		self._shadow_valid = False
+
+		# SPI traffic of the last redraw
+		self.frame_bytes = 0
+		self.frame_writes = 0
+
+		# Rows (CS frames) sent and skipped since the start
+		self.rows_sent = 0
+		self.rows_skipped = 0
+
 		self.fb = framebuf.FrameBuffer(self.buffer, 
 			const.COLS_IN_MATRIX * const.MATRIXES_IN_ROW,
 			const.ROWS_IN_MATRIX * const.MATRIXES_IN_COL, framebuf.MONO_HLSB)
@@ -39,68 +89,266 @@ class Matrix:
 		self.init_display(bright_lvl)
 
 	def init_display(self, bright_lvl: int):
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
-
-		self._write(const.DISPLAYTEST, const.DISPLAYTEST_TEST_OFF)
-
-		self._write(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS)
-		self._write(const.DECODEMODE, const.NO_BCD_DECODE)
-		self._write(const.INTENSITY, bright_lvl)
-
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		self.invalidate()
+		self._bright_lvl = bright_lvl
+		self._is_on = True
+
+		self.write_commands((
+			(const.SHUTDOWN, const.SHUTDOWN_MODE_ON),
+			(const.DISPLAYTEST, const.DISPLAYTEST_TEST_OFF),
+			(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS),
+			(const.DECODEMODE, const.NO_BCD_DECODE),
+			(const.INTENSITY, bright_lvl),
+			(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		))
 
 	def reinit_display(self, bright_lvl: int):
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
-
-		self._write(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS)
-		self._write(const.DECODEMODE, const.NO_BCD_DECODE)
-		self._write(const.INTENSITY, bright_lvl)
-
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		self.invalidate()
+		self._bright_lvl = bright_lvl
+		self._is_on = True
+
+		self.write_commands((
+			(const.SHUTDOWN, const.SHUTDOWN_MODE_ON),
+			(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS),
+			(const.DECODEMODE, const.NO_BCD_DECODE),
+			(const.INTENSITY, bright_lvl),
+			(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		))
 
 		# Signalize display re-init by horzizontal line in the middle.
 		self.fb.fill(0)
 		self.fb.fill_rect(0, Matrix.HALF_HEIGHT - 1, Matrix.WIDTH, 2, 1)
-		self.redraw_twice()
+		self.present()
 		sleep_ms(300)
 
 	def turn_off(self):
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_ON)
+		self._is_on = False
+		self.write_commands(((const.SHUTDOWN, const.SHUTDOWN_MODE_ON),))
 
 	def turn_on(self):
-		self._write(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF)
+		self._is_on = True
+		self.write_commands(((const.SHUTDOWN, const.SHUTDOWN_MODE_OFF),))
 
 	def display_test(self, is_on: bool):
-		self._write(const.DISPLAYTEST, 
-			  const.DISPLAY_TEST_ON if is_on else const.DISPLAYTEST_TEST_OFF)
+		self.write_commands(((const.DISPLAYTEST,
+			const.DISPLAY_TEST_ON if is_on else const.DISPLAYTEST_TEST_OFF),))
 
 	def set_brightness(self, val):
-		self._write(const.INTENSITY, val)
+		"""
+		Set the intensity of all the matrixes to the same level,
+		or to a level per matrix, if a sequence of levels is given.
+		"""
 
-	def redraw_twice(self):
-		"""Some LEDs need to tell it twice to understand..."""
+		self._bright_lvl = val
+		self.write_commands(((const.INTENSITY, val),))
 
+	def fade_brightness(self, target: int, duration_ms=const.FADE_DURATION_MS,
+			easing=ease_in_out):
+		"""
+		Fade the intensity of all the matrixes to the target level
+		in a background task. A running fade is cancelled and the new one
+		continues from the current level. The framebuffer isn't touched,
+		each step costs just one INTENSITY command.
+		Return the fade task or None, if there's nothing to fade.
+		"""
+
+		if self._fade_task is not None:
+			if self._fade_target == target:
+				return self._fade_task
+			self.cancel_fade()
+
+		if self._bright_lvl == target:
+			return None
+
+		self._fade_target = target
+		self._fade_task = asyncio.create_task(
+			self._fade(target, duration_ms, easing))
+
+		return self._fade_task
+
+	def cancel_fade(self):
+		"""Stop the running fade at the current level."""
+
+		if self._fade_task is not None:
+			self._fade_task.cancel()
+			self._fade_task = None
+			self._fade_target = None
+
+	async def _fade(self, target, duration_ms, easing):
+		start_lvl = self._bright_lvl
+		if not isinstance(start_lvl, int):
+			# Per-matrix levels, fade from the brightest one
+			start_lvl = max(start_lvl)
+
+		start = ticks_ms()
+		elapsed = 0
+
+		while elapsed < duration_ms:
+			level = start_lvl + round(
+				(target - start_lvl) * easing(elapsed / duration_ms))
+			if level != self._bright_lvl:
+				self.set_brightness(level)
+
+			await asyncio.sleep_ms(const.FADE_STEP_MS)
+			elapsed = ticks_diff(ticks_ms(), start)
+
+		self.set_brightness(target)
+
+		self._fade_task = None
+		self._fade_target = None
+
+	async def refresh(self, period_ms=const.DISPLAY_REFRESH_PERIOD_MS):
+		"""
+		Periodically re-send the configuration registers and the shown frame,
+		so the matrixes which missed or misunderstood something recover.
+		This replaces sending every frame twice.
+		"""
+
+		while True:
+			await asyncio.sleep_ms(period_ms)
+
+			self.write_commands((
+				(const.SCANLIMIT, const.SCANLIMIT_8_DIGITS),
+				(const.DECODEMODE, const.NO_BCD_DECODE),
+				(const.INTENSITY, self._bright_lvl),
+				(const.SHUTDOWN, const.SHUTDOWN_MODE_OFF
+					if self._is_on else const.SHUTDOWN_MODE_ON)
+			))
+
+			self.redraw(force=True)
+
+	def invalidate(self):
+		"""Force the next redraw to send all the rows."""
+
+		self._shadow_valid = False
+
+	def present(self):
+		"""Show the frame drawn in the back buffer."""
+
+		self._front[:] = self.buffer
+		self._frame_gen += 1
 		self.redraw()
-		self.redraw()
 
-	def redraw(self):
-		"""Translate contents of the buffer to the LED matrix."""
+	async def present_async(self):
+		"""
+		Hand the frame drawn in the back buffer over to the :func:`writer`
+		task instead of pushing it right away. If the previous frame
+		isn't sent completely yet, its remaining rows are dropped
+		in favour of this one.
+		"""
+
+		self._front[:] = self.buffer
+		self._frame_gen += 1
+		self._frame_ready.set()
+
+		# pass execution to other tasks
+		await asyncio.sleep_ms(0)
+
+	async def writer(self):
+		"""
+		This coroutine pushes the frames handed over by :func:`present_async`
+		to the LED matrix. It yields between the rows, so the transfer
+		doesn't block the other tasks. Whenever a newer frame arrives,
+		it starts over from the first row.
+		"""
+
+		while True:
+			await self._frame_ready.wait()
+			self._frame_ready.clear()
+
+			frame_gen = self._frame_gen
+			force = not self._shadow_valid
+			writes = 0
+			row_idx = 0
+
+			while row_idx < const.ROWS_IN_MATRIX:
+				if frame_gen != self._frame_gen:
+					# Latest frame wins
+					frame_gen = self._frame_gen
+					writes = 0
+					row_idx = 0
+
+				if self._redraw_row(row_idx, force):
+					writes += 1
+				row_idx += 1
+
+				await asyncio.sleep_ms(0)
+
+			self._shadow_valid = True
+			self._set_frame_stats(writes)
+
+	def redraw(self, force=False):
+		"""
+		Translate contents of the front buffer to the LED matrix.
+		Each row of all the cascaded matrixes is packed into one CS frame
+		and sent by a single SPI write. Rows which didn't change since
+		the last redraw are skipped and unchanged matrixes in a sent row
+		get NOOP, unless forced.
+		"""
+
+		force = force or not self._shadow_valid
+		writes = 0
 
 		for row_idx in range(const.ROWS_IN_MATRIX):
-			self.cs_pin.value(0)
+			if self._redraw_row(row_idx, force):
+				writes += 1
+
+		self._shadow_valid = True
+		self._set_frame_stats(writes)
+
+	def _redraw_row(self, row_idx, force):
+		"""
+		Send one row of the front buffer, if it changed or if forced.
+		Return True if the row was sent.
+		"""
 
+		row_buf = self._row_buf
+		register = const.ROW0 + row_idx
+		buf_idx = row_idx * const.MATRIXES_IN_ROW
+		dirty = False
+
+		for matrix_idx in range(const.MATRIXES_IN_ROW):
 			# First half of the buffer
-			for matrix_idx in range(const.MATRIXES_IN_ROW):
-				self.spi.write(bytearray([const.ROW0 + row_idx, 
-					self.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx]]))
+			top_idx = 2 * matrix_idx
+			dirty |= self._pack(row_buf, top_idx, register,
+				buf_idx + matrix_idx, force)
 
 			# Second half of the buffer
-			for matrix_idx in range(const.MATRIXES_IN_ROW):
-				self.spi.write(bytearray([const.ROW0 + row_idx, 
-					self.buffer[(row_idx * const.MATRIXES_IN_ROW) + matrix_idx
-					+ Matrix.BOTTOM_HALF_OFFSET]]))
+			bottom_idx = top_idx + 2 * const.MATRIXES_IN_ROW
+			dirty |= self._pack(row_buf, bottom_idx, register,
+				buf_idx + matrix_idx + Matrix.BOTTOM_HALF_OFFSET, force)
+
+		if not dirty:
+			self.rows_skipped += 1
+			return False
+
+		self.transport.write_block(row_buf)
 
-			self.cs_pin.value(1)
+		self.rows_sent += 1
+		return True
+
+	def _set_frame_stats(self, writes):
+		self.frame_writes = writes
+		self.frame_bytes = writes * len(self._row_buf)
+
+	def _pack(self, row_buf, row_buf_idx, register, buf_idx, force):
+		"""
+		Put the data of one matrix into the CS frame and remember it
+		in the shadow frame. Unchanged data is replaced by NOOP.
+		Return True if the data changed.
+		"""
+
+		data = self._front[buf_idx]
+
+		if not force and data == self._shadow[buf_idx]:
+			row_buf[row_buf_idx] = const.NOOP
+			row_buf[row_buf_idx + 1] = 0
+			return False
+
+		self._shadow[buf_idx] = data
+		row_buf[row_buf_idx] = register
+		row_buf[row_buf_idx + 1] = data
+		return True
 
 	def clear_half(self, side):
 		if side == const.LEFT:
@@ -114,7 +362,7 @@ class Matrix:
 			self.fb.fill_rect(Matrix.HALF_WIDTH + 1, 0, Matrix.HALF_WIDTH - 1,
 				Matrix.HEIGHT, 0)
 
-		self.redraw_twice()
+		self.present()
 
 	def clear_quarter(self, quarter):
 		if quarter == const.TOP_LEFT:
@@ -129,7 +377,7 @@ class Matrix:
 			self.fb.fill_rect(Matrix.HALF_WIDTH, Matrix.HALF_HEIGHT,
 				Matrix.HALF_WIDTH, Matrix.HALF_HEIGHT, 0)
 
-		self.redraw_twice()
+		self.present()
 
 	def clear_matrix_row(self, row):
 		if row == const.TOP_ROW:
@@ -138,13 +386,39 @@ class Matrix:
 			self.fb.fill_rect(0, Matrix.HALF_HEIGHT, Matrix.WIDTH,
 				Matrix.HALF_HEIGHT, 0)
 
-		self.redraw_twice()
+		self.present()
+
+	def write_commands(self, commands):
+		"""
+		Send a batch of (register, value) commands. The value is either
+		a single one for all the matrixes or a sequence of values,
+		one for each of the cascaded matrixes.
+		Each command takes one CS frame.
+		"""
+
+		for (register_add, value) in commands:
+			self.transport.write_block(self._packet(register_add, value))
+
+	def _packet(self, register_add, value):
+		"""
+		Get the CS frame of a command. Frames with the same value for all
+		the matrixes are built once and reused.
+		"""
+
+		if isinstance(value, int):
+			key = (register_add << 8) | value
+			packet = self._packets.get(key)
+
+			if packet is None:
+				packet = bytes([register_add, value]) * const.CASCADED_MATRIXES
+				self._packets[key] = packet
+
+			return packet
+
+		cmd_buf = self._cmd_buf
 
-	def _write(self, register_add, data):
-		self.cs_pin.value(0)
-		
-		for _ in range(const.CASCADED_MATRIXES):
-			self.spi.write(bytearray([register_add, data]))
-		
-		self.cs_pin.value(1)
+		for matrix_idx in range(const.CASCADED_MATRIXES):
+			cmd_buf[2 * matrix_idx] = register_add
+			cmd_buf[2 * matrix_idx + 1] = value[matrix_idx]
 
+		return cmd_buf
@@ -3,6 +3,14 @@
 from app.char import Char
 from app.line import VerticalLine, HorizontalLine
 
+import framebuf
+
+try:
+	# Generated by tools/font_compiler.py
+	import app.font_data as font_data
+except ImportError:
+	font_data = None
+
 class BigDigit:
 	def __init__(self):
 		"""
@@ -169,8 +177,7 @@ class BigDigit:
 		]
 
 	def get(self, idx: int):
-		# Copy Char for further modifications
-		return self.digits[idx].deepcopy()
+		return self.digits[idx]
 
 
 class MediumDigit:
@@ -339,8 +346,7 @@ class MediumDigit:
 		]
 
 	def get(self, idx: int):
-		# Copy Char for further modifications
-		return self.digits[idx].deepcopy()
+		return self.digits[idx]
 
 class Medium:
 	def __init__(self):
@@ -551,5 +557,71 @@ class Medium:
 		}
 
 	def get(self, char):
-		# Copy Char for further modifications
-		return self.chars[char].deepcopy()
\ No newline at end of file
+		return self.chars[char]
+
+class Glyph:
+	__slots__ = ("_bitmap", "width", "advance")
+
+	def __init__(self, bitmap, width: int, advance: int):
+		"""
+		Represents a compiled char: a packed MONO_HLSB bitmap
+		with its ink width and advance.
+		"""
+
+		self._bitmap = (bitmap, Char.WIDTH, Char.HEIGHT, framebuf.MONO_HLSB)
+		self.width = width
+		self.advance = advance
+
+	def render(self, framebuf, x_offset=0, y_offset=0):
+		# Key 0 keeps the pixels around the char untouched
+		framebuf.blit(self._bitmap, x_offset, y_offset, 0)
+
+
+class CompiledFont:
+	def __init__(self, data, prefix: str):
+		"""
+		Represents a font compiled by tools/font_compiler.py.
+		The glyph bitmaps are read directly from the bytes constants
+		of the generated module, so they aren't copied to RAM.
+		Blitting from a bytes buffer needs MicroPython 1.20 or newer.
+		"""
+
+		keys = getattr(data, prefix + "_KEYS")
+		bitmaps = memoryview(getattr(data, prefix + "_BITMAPS"))
+		widths = getattr(data, prefix + "_WIDTHS")
+		advances = getattr(data, prefix + "_ADVANCES")
+
+		glyph_len = len(bitmaps) // len(keys)
+
+		self.glyphs = {}
+		for (idx, key) in enumerate(keys):
+			self.glyphs[key] = Glyph(
+				bitmaps[idx * glyph_len:(idx + 1) * glyph_len],
+				widths[idx], advances[idx])
+
+	def get(self, key):
+		return self.glyphs[key]
+
+
+# Shared font instances. The fonts and their chars are never modified,
+# so one instance of each font is enough. Compiled fonts are preferred,
+# the line-defined ones are the fallback.
+if font_data is not None:
+	BIG_DIGIT = CompiledFont(font_data, "BIG_DIGIT")
+	MEDIUM_DIGIT = CompiledFont(font_data, "MEDIUM_DIGIT")
+	MEDIUM = CompiledFont(font_data, "MEDIUM")
+else:
+	BIG_DIGIT = BigDigit()
+	MEDIUM_DIGIT = MediumDigit()
+	MEDIUM = Medium()
+
+FONTS = {
+	"big_digit": BIG_DIGIT,
+	"medium_digit": MEDIUM_DIGIT,
+	"medium": MEDIUM
+}
+
+def get_font(name: str):
+	"""Get the shared instance of the font registered by the name."""
+
+	return FONTS[name]
@@ -0,0 +1,56 @@
+# Generated by tools/font_compiler.py from app/font.py. Do not edit.
+# Glyph bitmaps are MONO_HLSB, 8 x 16 points, 16 bytes per glyph.
+# Widths are the ink widths, advances include the spacing.
+
+BIG_DIGIT_KEYS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+BIG_DIGIT_BITMAPS = (
+	b"\x7e\xff\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xff\x7e"
+	b"\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0"
+	b"\xff\xff\x03\x03\x03\x03\x03\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff"
+	b"\xff\xff\x03\x03\x03\x03\x03\xff\xff\x03\x03\x03\x03\x03\xff\xff"
+	b"\xc3\xc3\xc3\xc3\xc3\xc3\xc3\xff\xff\x03\x03\x03\x03\x03\x03\x03"
+	b"\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff\x03\x03\x03\x03\x03\xff\xff"
+	b"\xff\xff\xc0\xc0\xc0\xc0\xc0\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff"
+	b"\xff\xff\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03\x03"
+	b"\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff"
+	b"\xff\xff\xc3\xc3\xc3\xc3\xc3\xff\xff\x03\x03\x03\x03\x03\xff\xff"
+)
+BIG_DIGIT_WIDTHS = b'\x08\x02\x08\x08\x08\x08\x08\x08\x08\x08'
+BIG_DIGIT_ADVANCES = b'\n\x04\n\n\n\n\n\n\n\n'
+
+MEDIUM_DIGIT_KEYS = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9)
+MEDIUM_DIGIT_BITMAPS = (
+	b"\x00\x78\xfc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xfc\x78\x00"
+	b"\x00\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\xc0\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+	b"\x00\xcc\xcc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x00"
+	b"\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+	b"\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x00"
+	b"\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00"
+	b"\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+)
+MEDIUM_DIGIT_WIDTHS = b'\x06\x02\x06\x06\x06\x06\x06\x06\x06\x06'
+MEDIUM_DIGIT_ADVANCES = b'\x08\x04\x08\x08\x08\x08\x08\x08\x08\x08'
+
+MEDIUM_KEYS = ('0', '1', '2', '3', '4', '5', '6', '7', '8', '9', '°', 'A', 'C', 'J', 'S')
+MEDIUM_BITMAPS = (
+	b"\x00\x78\xfc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xcc\xfc\x78\x00"
+	b"\x00\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x18\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+	b"\x00\xcc\xcc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x00"
+	b"\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+	b"\x00\xfc\xfc\xc0\xc0\xc0\xc0\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00"
+	b"\x00\xfc\xfc\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x0c\x00"
+	b"\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x00"
+	b"\x00\xfc\xfc\xcc\xcc\xcc\xcc\xfc\xfc\x0c\x0c\x0c\x0c\xfc\xfc\x00"
+	b"\x00\x0e\x0a\x0e\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
+	b"\x00\x3c\x7e\x66\x66\x66\x66\x7e\x7e\x66\x66\x66\x66\x66\x66\x00"
+	b"\x00\x3c\x7e\x60\x60\x60\x60\x60\x60\x60\x60\x60\x60\x7e\x3c\x00"
+	b"\x00\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06\x06\x7e\x7c\x00"
+	b"\x00\x3c\x7e\x60\x60\x60\x60\x7c\x3e\x06\x06\x06\x06\x7e\x3c\x00"
+)
+MEDIUM_WIDTHS = b'\x06\x05\x06\x06\x06\x06\x06\x06\x06\x06\x07\x07\x07\x07\x07'
+MEDIUM_ADVANCES = b'\x08\x07\x08\x08\x08\x08\x08\x08\x08\x08\t\t\t\t\t'
@@ -0,0 +1,75 @@
+# Author: Marek Jankech
+
+import uasyncio as asyncio
+from utime import ticks_ms, ticks_diff, ticks_add
+
+class FrameClock:
+    def __init__(self, fps: int):
+        """
+        Paces an animation to a fixed frame rate. The time spent
+        by rendering is subtracted from the wait for the next frame.
+        When the animation falls behind, the late frames are skipped
+        rather than slowing the animation down.
+        """
+
+        self.period_ms = 1000 // fps
+
+        self._deadline = ticks_ms()
+        self._last_tick = self._deadline
+
+        self.frames = 0
+        self.dropped = 0
+        # Time spent by animating, without the idle time between
+        # the animations
+        self._animated_ms = 0
+
+    def start(self):
+        """Start pacing from now, e.g. at the beginning of an animation."""
+
+        self._last_tick = ticks_ms()
+        self._deadline = ticks_add(self._last_tick, self.period_ms)
+
+    def reset_stats(self):
+        self.frames = 0
+        self.dropped = 0
+        self._animated_ms = 0
+
+    def fps(self):
+        """
+        Get the achieved frame rate since the stats reset, counting
+        only the time between :func:`start` and the last :func:`tick`
+        of each animation.
+        """
+
+        if self._animated_ms <= 0:
+            return 0
+        return self.frames * 1000 / self._animated_ms
+
+    async def tick(self):
+        """
+        Wait for the time of the next frame.
+        Return the number of frames the animation should advance,
+        which is more than 1, if some frames were skipped.
+        """
+
+        late = ticks_diff(ticks_ms(), self._deadline)
+
+        if late < 0:
+            await asyncio.sleep_ms(-late)
+            skipped = 0
+        else:
+            skipped = late // self.period_ms
+            # pass execution to other tasks
+            await asyncio.sleep_ms(0)
+
+        self._deadline = ticks_add(self._deadline,
+            (skipped + 1) * self.period_ms)
+
+        now = ticks_ms()
+        self._animated_ms += ticks_diff(now, self._last_tick)
+        self._last_tick = now
+
+        self.frames += 1
+        self.dropped += skipped
+
+        return skipped + 1
@@ -2,6 +2,7 @@
 
 import app.constants as const
 from app.display import Matrix
+from app.transport import SpiTransport
 from machine import Pin, SPI, UART, RTC
 
 # Display SPI config 
@@ -12,7 +13,7 @@ mx_spi = SPI(const.DISPLAY_SPI_ID, baudrate=const.DISPLAY_SPI_BAUD,
 cs_pin = Pin(const.DISPLAY_SPI_CS_PIN, Pin.OUT)
 
 # LED matrix singleton
-display = Matrix(mx_spi, cs_pin, const.INITIAL_BRIGHTNESS)
+display = Matrix(SpiTransport(mx_spi, cs_pin), const.INITIAL_BRIGHTNESS)
 
 # BLE module on UART singleton
 ble_uart = UART(const.BLE_UART_ID, baudrate=9600, 
@@ -1,6 +1,8 @@
 # Author: Marek Jankech
 
 class HorizontalLine:
+	__slots__ = ("x", "y", "width")
+
 	def __init__(self, start_x: int, start_y: int, width: int):
 		"""
 		Represents a horizontal line on a matrix defined
@@ -12,17 +14,13 @@ class HorizontalLine:
 		self.y = start_y
 		self.width = width
 
-	def copy(self):
-		return HorizontalLine(self.x, self.y, self.width)
-
-	def x_shift(self, x_offset: int):
-		self.x += x_offset
-
-	def render(self, framebuf):
-		framebuf.hline(self.x, self.y, self.width, 1)
+	def render(self, framebuf, x_offset=0, y_offset=0):
+		framebuf.hline(self.x + x_offset, self.y + y_offset, self.width, 1)
 
 
 class VerticalLine:
+	__slots__ = ("x", "y", "height")
+
 	def __init__(self, start_x: int, start_y: int, height: int):
 		"""
 		Represents a vertical line on a matrix defined
@@ -34,11 +32,5 @@ class VerticalLine:
 		self.y = start_y
 		self.height = height
 
-	def copy(self):
-		return VerticalLine(self.x, self.y, self.height)
-
-	def x_shift(self, x_offset: int):
-		self.x += x_offset
-
-	def render(self, framebuf):
-		framebuf.vline(self.x, self.y, self.height, 1)
+	def render(self, framebuf, x_offset=0, y_offset=0):
+		framebuf.vline(self.x + x_offset, self.y + y_offset, self.height, 1)
@@ -1,12 +1,12 @@
 # Author: Marek Jankech
 
 from machine import Pin
-from app.mx_data import MxScore
+from app.mx_data import MxScore, MxDate, MxTime
 from app.data import Config
-# TODO
-# from app.mx_data import MxDate, MxTime
 from app.hw import display, ble_uart, rtc
 from app.view import BasicViewer
+from app.protocol import (Dispatcher, BinaryProtocol, parse_ints, parse_bool,
+    check_datetime)
 
 import uasyncio as asyncio
 import ujson as json
@@ -17,6 +17,48 @@ import gc
 import os
 
 class App:
+    # Command token, the name of its handler and the name of its value
+    # validator, which raises ValueError for an invalid value. The handlers
+    # get the value of the command as a memoryview and may return
+    # a coroutine. The validators let a batch be checked before applying.
+    COMMANDS = (
+        (const.SET_SCORE_CMD_PREFIX, "handle_set_score_cmd",
+            "parse_score_value"),
+        (const.GET_SCORE_CMD, "handle_get_score_cmd", None),
+        (const.SET_TIME_CMD_PREFIX, "handle_set_time_cmd",
+            "parse_time_value"),
+        (const.SET_BRIGHTNESS_CMD_PREFIX, "handle_set_bright_cmd",
+            "parse_bright_value"),
+        (const.SET_SHOW_SCORE_CMD_PREFIX, "handle_set_show_score_cmd",
+            "parse_bool_value"),
+        (const.SET_SHOW_TIME_CMD_PREFIX, "handle_set_show_time_cmd",
+            "parse_bool_value"),
+        (const.SET_SCROLL_CMD_PREFIX, "handle_set_scroll_cmd",
+            "parse_bool_value"),
+        (const.GET_CONFIG_CMD, "handle_get_cfg_cmd", None),
+        (const.PERSIST_CONFIG_CMD_PREFIX, "handle_persist_cfg_cmd",
+            "parse_cfg_value"),
+        (const.SET_ALL_LEDS_ON_CMD_PREFIX, "handle_all_leds_on_cmd",
+            "parse_bool_value"),
+        (const.DISCONNECT_CMD, "handle_disconnect_cmd", None),
+        (const.BATCH_CMD_PREFIX, "handle_batch_cmd", "reject_nested_batch"),
+        (const.BINARY_MODE_CMD_PREFIX, "handle_binary_mode_cmd",
+            "parse_bool_value")
+    )
+
+    # Opcode, payload format and handler of the binary protocol commands.
+    # The handlers get the unpacked payload fields.
+    BINARY_COMMANDS = (
+        (const.BIN_SET_SCORE, const.BIN_SCORE_FMT, "handle_bin_set_score"),
+        (const.BIN_SET_TIME, const.BIN_TIME_FMT, "handle_bin_set_time"),
+        (const.BIN_SET_BRIGHT, const.BIN_BRIGHT_FMT, "handle_bin_set_bright"),
+        (const.BIN_SET_FLAGS, const.BIN_FLAGS_FMT, "handle_bin_set_flags"),
+        (const.BIN_GET_SCORE, const.BIN_NO_PAYLOAD_FMT,
+            "handle_bin_get_score"),
+        (const.BIN_GET_CONFIG, const.BIN_NO_PAYLOAD_FMT,
+            "handle_bin_get_cfg")
+    )
+
     def __init__(self):
         """
         Main application. 
@@ -33,7 +75,6 @@ class App:
         self.score_reset = False
         self.revert_score = False
         self.exit = False
-        self.basic_mode = True
         self.display_on = True
         
         self.last_button = 0x00
@@ -44,12 +85,27 @@ class App:
         # Info renderable on the matrix
         self.mx_score = MxScore()
 
-        self.basic_viewer = BasicViewer()
-        self.basic_viewer.score = self.mx_score  # type: ignore
+        self.basic_viewer = BasicViewer(self.mx_score)
 
         self.ble_reader = asyncio.StreamReader(ble_uart)
         self.ble_writer = asyncio.StreamWriter(ble_uart, {})
 
+        # Nesting level of the batch commands being applied
+        self.batch_depth = 0
+
+        self.dispatcher = Dispatcher()
+        for (token, handler_name, validator_name) in self.COMMANDS:
+            self.dispatcher.register(token, getattr(self, handler_name),
+                None if validator_name is None
+                else getattr(self, validator_name))
+
+        # Switched on by the BINARY_MODE=1 handshake. The ASCII commands
+        # are still accepted, they just don't start by the sync byte.
+        self.binary_mode = False
+        self.binary = BinaryProtocol()
+        for (opcode, fmt, handler_name) in self.BINARY_COMMANDS:
+            self.binary.register(opcode, fmt, getattr(self, handler_name))
+
     def toggle_on_off(self):
         """
         Toggle display on/off.
@@ -75,121 +131,118 @@ class App:
 
     def exit_program(self):
         self.exit = True
-        self.basic_mode = False
+        self.basic_viewer.stop()
 
-    async def handle_set_score_cmd(self, cmd: str):
+    def handle_set_score_cmd(self, value):
         print("Handle SET_SCORE command")
-        score_and_timestamp = cmd[len(const.SET_SCORE_CMD_PREFIX):]\
-            .split(const.TIMESTAMP_DELIMITER)
-        if len(score_and_timestamp) == 2:
-            score = score_and_timestamp[0]\
-                .split(const.SET_SCORE_CMD_SCORE_DELIMITER)
-            if len(score) == 2:
-                isOk = False
-                try:
-                    left_score = int(score[0])
-                    right_score = int(score[1])
-                    timestamp = int(score_and_timestamp[1])
-                    isOk = True
-                except ValueError:
-                    print("Unable to parse score and timestamp!")
-                if isOk:
-                    self.basic_mode = False
-                    self.basic_viewer.disable()
-                    self.mx_score.timestamp = timestamp
-                    await self.mx_score.render_change(left_score, right_score)
-                    self.basic_mode = True
-
-    def handle_set_time_cmd(self, cmd: str):
+        isOk = False
+        try:
+            (left_score, right_score, timestamp) = self.parse_score_value(value)
+            isOk = True
+        except ValueError:
+            print("Unable to parse score and timestamp!")
+        if isOk:
+            self.set_score(left_score, right_score, timestamp)
+
+    def set_score(self, left_score, right_score, timestamp):
+        self.basic_viewer.stop()
+        self.mx_score.timestamp = timestamp
+        change_task = self.mx_score.change(left_score, right_score)
+        asyncio.create_task(
+            self.resume_after_score_change(change_task))
+
+    async def resume_after_score_change(self, change_task):
+        """
+        Return to the basic mode once the score change animation ends.
+        """
+
+        try:
+            await change_task
+        except asyncio.CancelledError:
+            # Retargeted by a newer score, which resumes the basic mode
+            return
+
+        print("Score change latency: {} ms".format(
+            self.mx_score.change_latency_ms))
+        if self.batch_depth == 0:
+            self.basic_viewer.start()
+
+    def handle_set_time_cmd(self, value):
         print("Handle SET_TIME command")
-        datetime_str = cmd[len(const.SET_TIME_CMD_PREFIX):]
-        datetime_split = datetime_str.split()
-        print(datetime_split)
-        if len(datetime_split) == 3:
-            try:
-                weekday = int(datetime_split[0])
-                
-                day_month_year = datetime_split[1].split(".")
-                if len(day_month_year) == 3:
-                    day = int(day_month_year[0])
-                    month = int(day_month_year[1])
-                    year = int(day_month_year[2])
-                
-                hour_minute_second = datetime_split[2].split(":")
-                if len(hour_minute_second) == 3:
-                    hour = int(hour_minute_second[0])
-                    minute = int(hour_minute_second[1])
-                    second = int(hour_minute_second[2])
-
-                # Set date and time of the Real Time Clock
-                rtc.datetime(
-                    (year, month, day, weekday, hour, minute, second, 0))
-            except ValueError | NameError:
-                print("Unable to parse datetime!")
-
-    def handle_set_bright_cmd(self, cmd: str):
+        try:
+            (weekday, day, month, year, hour, minute, second) = (
+                self.parse_time_value(value))
+
+            self.set_datetime(year, month, day, weekday, hour, minute, second)
+        except ValueError as e:
+            print("Unable to parse datetime! {}".format(e))
+        except OSError as e:
+            print("Unable to set datetime! {}".format(e))
+
+    def set_datetime(self, year, month, day, weekday, hour, minute, second):
+        # Set date and time of the Real Time Clock
+        rtc.datetime((year, month, day, weekday, hour, minute, second, 0))
+
+        # Don't wait for the next pull period or the next minute
+        # to show the new time
+        MxDate().invalidate()
+        MxTime().invalidate()
+        self.basic_viewer.notify()
+
+    def handle_set_bright_cmd(self, value):
         print("Handle SET_BRIGHTNESS command")
-        brightness = cmd[len(const.SET_BRIGHTNESS_CMD_PREFIX):]
         isOk = False
         try:
-            level = int(brightness)
+            level = self.parse_bright_value(value)
             isOk = True
         except ValueError:
             print("Unable to parse brightness level!")
         if isOk:
-            if level < const.MIN_BRIGHTNESS:
-                level = const.MIN_BRIGHTNESS
-            elif level > const.MAX_BRIGHTNESS:
-                level = const.MAX_BRIGHTNESS
-            self.display.set_brightness(level)
-            self.basic_viewer.config.bright_lvl = level
-
-    def handle_set_show_score_cmd(self, cmd: str):
+            self.set_brightness(level)
+
+    def set_brightness(self, level):
+        if level < const.MIN_BRIGHTNESS:
+            level = const.MIN_BRIGHTNESS
+        elif level > const.MAX_BRIGHTNESS:
+            level = const.MAX_BRIGHTNESS
+        # Just the intensity, the viewer keeps on rendering undisturbed
+        self.display.fade_brightness(level)
+        self.basic_viewer.config.update(bright_lvl=level)
+
+    def handle_set_show_score_cmd(self, value):
         print("Handle SET_SHOW_SCORE command")
-        show_score_str = cmd[len(const.SET_SHOW_SCORE_CMD_PREFIX):]
-        show_score = self.parse_bool_str_cmd_val(show_score_str)
+        show_score = parse_bool(value)
         if show_score is None:
             print("Invalid show score value!")
         else:
-            # Halt rendering only if show_score value is different
+            # Wake the viewer only if show_score value is different
             # than the value in current config.
-            if self.basic_viewer.config.use_score != show_score:
-                self.basic_mode = False
-                self.basic_viewer.disable()
-                self.basic_viewer.config.use_score = show_score
-                self.basic_mode = True
+            if self.basic_viewer.config.update(use_score=show_score):
+                self.basic_viewer.notify()
 
-    def handle_set_show_time_cmd(self, cmd: str):
+    def handle_set_show_time_cmd(self, value):
         print("Handle SET_SHOW_TIME command")
-        show_time_str = cmd[len(const.SET_SHOW_TIME_CMD_PREFIX):]
-        show_time = self.parse_bool_str_cmd_val(show_time_str)
+        show_time = parse_bool(value)
         if show_time is None:
             print("Invalid show time value!")
         else:
-            # Halt rendering only if show_time value is different
+            # Wake the viewer only if show_time value is different
             # than the value in current config.
-            if self.basic_viewer.config.use_time != show_time:
-                self.basic_mode = False
-                self.basic_viewer.disable()
-                self.basic_viewer.config.use_time = show_time
-                self.basic_mode = True
+            if self.basic_viewer.config.update(use_time=show_time):
+                self.basic_viewer.notify()
     
-    def handle_set_scroll_cmd(self, cmd: str):
+    def handle_set_scroll_cmd(self, value):
         print("Handle SET_SCROLL command")
-        scroll_str = cmd[len(const.SET_SCROLL_CMD_PREFIX):]
-        scroll = self.parse_bool_str_cmd_val(scroll_str)
+        scroll = parse_bool(value)
         if scroll is None:
             print("Invalid scroll value!")
         else:
-            # Halt rendering only if scroll value is different
+            # Wake the viewer only if scroll value is different
             # than the value in current config.
-            if self.basic_viewer.config.scroll != scroll:
-                self.basic_mode = False
-                self.basic_viewer.disable()
-                self.basic_viewer.config.scroll = scroll
-                self.basic_mode = True
+            if self.basic_viewer.config.update(scroll=scroll):
+                self.basic_viewer.notify()
 
-    async def handle_get_score_cmd(self, cmd: str):
+    async def handle_get_score_cmd(self, value):
         print("Handle GET_SCORE command")
         score = self.mx_score.score
         cmd_to_send = "{}{}:{}T{}\r\n".format(
@@ -198,24 +251,21 @@ class App:
         print("Sending {}".format(cmd_to_send))
         await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
 
-    async def handle_get_cfg_cmd(self, cmd: str):
+    async def handle_get_cfg_cmd(self, value):
         print("Handle GET_CONFIG command")
-        cfg_str = json.dumps(self.basic_viewer.config.__dict__)
+        cfg_str = json.dumps(self.basic_viewer.config.to_dict())
         cmd_to_send = "{}{}\r\n".format(
             const.CONFIG_CMD_PREFIX, cfg_str)
         print("Sending {}".format(cmd_to_send))
         await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
 
-    async def handle_persist_cfg_cmd(self, cmd: str):
+    async def handle_persist_cfg_cmd(self, value):
         print("Handle PERSIST_CONFIG command")
-        cfg_str = cmd[len(const.PERSIST_CONFIG_CMD_PREFIX):]
         isOk = False
         try:
-            # Just test that the json config could be converted to Config obj
-            cfg_dict = json.loads(cfg_str)
-            Config(**cfg_dict)
+            cfg_str = self.parse_cfg_value(value)
             isOk = True
-        except ValueError | TypeError:
+        except ValueError:
             print("Unable to parse Config!")
         if isOk:
             if not self.dir_exists(const.DATA_DIR):
@@ -226,37 +276,209 @@ class App:
             print("Sending {}".format(cmd_to_send))
             await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
 
-    def handle_all_leds_on_cmd(self, cmd: str):
+    def handle_all_leds_on_cmd(self, value):
         print("Handle SET_ALL_LEDS_ON command")
-        all_leds_on_str = cmd[len(const.SET_ALL_LEDS_ON_CMD_PREFIX):]
-        all_leds_on = self.parse_bool_str_cmd_val(all_leds_on_str)
+        all_leds_on = parse_bool(value)
         if all_leds_on is None:
             print("Invalid value for SET_ALL_LEDS_ON!")
         else:
             if all_leds_on:
                 print("Set all LEDs on!")
-                self.basic_mode = False
-                self.basic_viewer.disable()
+                self.basic_viewer.stop()
                 self.display.fill(1)
-                self.display.redraw_twice()
+                self.display.present()
             else:
                 print("Disable all LEDs on!")
-                self.basic_mode = True
+                self.basic_viewer.start()
 
-    async def handle_disconnect_cmd(self, cmd: str):
+    async def handle_disconnect_cmd(self, value):
         cmd_to_send = const.AT_DISCONNECT_CMD + "\r\n"
         print("Sending {}".format(cmd_to_send))
         await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
 
-    def parse_bool_str_cmd_val(self, str_val: str):
-        if str_val == "1":
-            bool_val = True
-        elif str_val == "0":
-            bool_val = False
-        else:
-            bool_val = None
+    def parse_score_value(self, value):
+        """Parse left:rightTtimestamp, raise ValueError if invalid."""
+
+        return parse_ints(value,
+            const.SET_SCORE_CMD_SCORE_DELIMITER + const.TIMESTAMP_DELIMITER)
+
+    def parse_time_value(self, value):
+        """
+        Parse "weekday dd.mm.yyyy hh:mm:ss", raise ValueError if invalid,
+        including the fields out of their ranges.
+        """
+
+        fields = parse_ints(value, " .. ::")
+        (weekday, day, month, year, hour, minute, second) = fields
+        check_datetime(year, month, day, weekday, hour, minute, second)
+        return fields
+
+    def parse_bright_value(self, value):
+        return parse_ints(value)[0]
+
+    def parse_bool_value(self, value):
+        bool_val = parse_bool(value)
+        if bool_val is None:
+            raise ValueError("Invalid bool value")
         return bool_val
-    
+
+    def parse_cfg_value(self, value):
+        """
+        Get the json config, checked that it could be converted
+        to Config obj. Raise ValueError if it couldn't.
+        """
+
+        try:
+            cfg_str = bytes(value).decode('ascii')
+            Config(**json.loads(cfg_str))
+        except TypeError:
+            raise ValueError("Invalid config")
+        return cfg_str
+
+    def reject_nested_batch(self, value):
+        if self.batch_depth > 0:
+            raise ValueError("Nested batch")
+
+    async def handle_batch_cmd(self, value):
+        """
+        Apply several commands sent in one line, separated by ';',
+        e.g. on the initial sync. All the commands are validated first,
+        if any of them is invalid, none is applied and BATCH_NACK is sent.
+        Otherwise the viewer is stopped just once for the whole batch,
+        so it shows only the final state, and the batch is acknowledged
+        by a single BATCH_ACK, or by BATCH_NACK if applying of a command
+        failed.
+        """
+
+        print("Handle BATCH command")
+        line = bytes(value)
+        delimiter = const.BATCH_CMD_DELIMITER.encode('ascii')
+
+        commands = [cmd for cmd in line.split(delimiter) if cmd]
+
+        self.batch_depth += 1
+        try:
+            for cmd in commands:
+                self.dispatcher.validate(cmd)
+        except ValueError as e:
+            print("Invalid batch: {}".format(e))
+            self.batch_depth -= 1
+            await self.send_batch_reply(const.BATCH_NACK_CMD)
+            return
+
+        self.basic_viewer.stop()
+
+        reply = const.BATCH_ACK_CMD
+        try:
+            for cmd in commands:
+                handled = self.dispatcher.dispatch(cmd)
+                if handled is not None:
+                    await handled
+        except (ValueError, OSError) as e:
+            # Failed on applying, e.g. writing the config to the flash,
+            # which the validation can't tell in advance
+            print("Unable to apply batch: {}".format(e))
+            reply = const.BATCH_NACK_CMD
+        finally:
+            self.batch_depth -= 1
+
+            # A score change resumes the viewer after its animation
+            if not self.mx_score.is_changing():
+                self.basic_viewer.start()
+
+        await self.send_batch_reply(reply)
+
+    async def send_batch_reply(self, reply):
+        cmd_to_send = "{}\r\n".format(reply)
+        print("Sending {}".format(cmd_to_send))
+        await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
+
+    async def handle_binary_mode_cmd(self, value):
+        print("Handle BINARY_MODE command")
+        binary_mode = parse_bool(value)
+        if binary_mode is None:
+            print("Invalid binary mode value!")
+        else:
+            self.binary_mode = binary_mode
+            cmd_to_send = "{}\r\n".format(const.BINARY_MODE_ACK_CMD)
+            print("Sending {}".format(cmd_to_send))
+            await self.ble_writer.awrite(cmd_to_send.encode('ascii'))
+
+    async def handle_bin_set_score(self, left_score, right_score, timestamp):
+        self.set_score(left_score, right_score, timestamp)
+        await self.send_bin_frame(const.BIN_ACK, const.BIN_ACK_FMT,
+            const.BIN_SET_SCORE)
+
+    async def handle_bin_set_time(self, year, month, day, weekday,
+        hour, minute, second):
+        check_datetime(year, month, day, weekday, hour, minute, second)
+        self.set_datetime(year, month, day, weekday, hour, minute, second)
+        await self.send_bin_frame(const.BIN_ACK, const.BIN_ACK_FMT,
+            const.BIN_SET_TIME)
+
+    async def handle_bin_set_bright(self, level):
+        self.set_brightness(level)
+        await self.send_bin_frame(const.BIN_ACK, const.BIN_ACK_FMT,
+            const.BIN_SET_BRIGHT)
+
+    async def handle_bin_set_flags(self, flags):
+        if self.basic_viewer.config.update(
+                use_score=bool(flags & const.BIN_FLAG_SHOW_SCORE),
+                use_time=bool(flags & const.BIN_FLAG_SHOW_TIME),
+                scroll=bool(flags & const.BIN_FLAG_SCROLL)):
+            self.basic_viewer.notify()
+        await self.send_bin_frame(const.BIN_ACK, const.BIN_ACK_FMT,
+            const.BIN_SET_FLAGS)
+
+    async def handle_bin_get_score(self):
+        score = self.mx_score.score
+        await self.send_bin_frame(const.BIN_SCORE, const.BIN_SCORE_FMT,
+            score.left, score.right, self.mx_score.timestamp)
+
+    async def handle_bin_get_cfg(self):
+        config = self.basic_viewer.config
+        flags = 0
+        if config.use_score:
+            flags |= const.BIN_FLAG_SHOW_SCORE
+        if config.use_time:
+            flags |= const.BIN_FLAG_SHOW_TIME
+        if config.scroll:
+            flags |= const.BIN_FLAG_SCROLL
+        await self.send_bin_frame(const.BIN_CONFIG, const.BIN_CONFIG_FMT,
+            flags, config.bright_lvl)
+
+    async def send_bin_frame(self, opcode, fmt, *values):
+        (buf, length) = self.binary.pack(opcode, fmt, *values)
+        await self.ble_writer.awrite(buf, 0, length)
+
+    async def recv_bin_frame(self):
+        """
+        Receive and handle a binary frame, whose sync byte was already read.
+        A malformed, unknown or truncated frame, i.e. not received within
+        BIN_FRAME_TIMEOUT_MS, or a frame whose fields are rejected
+        by its handler, is answered by NACK.
+        """
+
+        try:
+            opcode = await asyncio.wait_for_ms(
+                self.binary.read_frame(self.ble_reader),
+                const.BIN_FRAME_TIMEOUT_MS)
+        except asyncio.TimeoutError:
+            # Truncated frame, the rest of it is dropped as the garbage
+            # between the frames
+            opcode = None
+
+        try:
+            if opcode is None:
+                raise ValueError("Malformed frame")
+            handled = self.binary.dispatch(opcode)
+            if handled is not None:
+                await handled
+        except (ValueError, OSError) as e:
+            print("Invalid binary frame: {}".format(e))
+            await self.send_bin_frame(const.BIN_NACK, const.BIN_ACK_FMT,
+                opcode or 0)
+
     def dir_exists(self, dir_path):
         try:
             os.listdir(dir_path)
@@ -276,47 +498,40 @@ class App:
             print("Free memory: {:.2f} KB".format(gc.mem_free() / 1024))
             await asyncio.sleep_ms(3000)
 
-    async def basic_operation(self):
-        while True:
-            if self.basic_mode:
-                await self.basic_viewer.view_info()
-            # pass execution to other tasks
-            await asyncio.sleep_ms(0)
-
     async def recv_cmd(self):
         while True:
-            cmd = await self.ble_reader.readline()
+            if self.binary_mode:
+                first = await self.ble_reader.read(1)
+                if not first:
+                    continue
+                if first[0] == const.BIN_SYNC:
+                    await self.recv_bin_frame()
+                    continue
+                if not (const.ASCII_PRINTABLE_MIN <= first[0]
+                        <= const.ASCII_PRINTABLE_MAX):
+                    # Drop the garbage until the next sync byte
+                    # or an ASCII command
+                    continue
+                # Fall back to an ASCII command
+                cmd = first + await self.ble_reader.readline()
+            else:
+                cmd = await self.ble_reader.readline()
+
             if (cmd is not None and len(cmd) > 2
                     and cmd[-2] == const.CR and cmd[-1] == const.LF):
-                decoded = cmd[0:-2].decode('ascii')
-                print("Received command: {}".format(decoded))
-
-                if decoded.startswith(const.SET_SCORE_CMD_PREFIX):
-                    await self.handle_set_score_cmd(decoded)
-                elif decoded.startswith(const.GET_SCORE_CMD):
-                    await self.handle_get_score_cmd(decoded)
-                elif decoded.startswith(const.SET_TIME_CMD_PREFIX):
-                    self.handle_set_time_cmd(decoded)
-                elif decoded.startswith(const.SET_BRIGHTNESS_CMD_PREFIX):
-                    self.handle_set_bright_cmd(decoded)
-                elif decoded.startswith(const.SET_SHOW_SCORE_CMD_PREFIX):
-                    self.handle_set_show_score_cmd(decoded)
-                elif decoded.startswith(const.SET_SHOW_TIME_CMD_PREFIX):
-                    self.handle_set_show_time_cmd(decoded)
-                elif decoded.startswith(const.SET_SCROLL_CMD_PREFIX):
-                    self.handle_set_scroll_cmd(decoded)
-                elif decoded.startswith(const.GET_CONFIG_CMD):
-                    await self.handle_get_cfg_cmd(decoded)
-                elif decoded.startswith(const.PERSIST_CONFIG_CMD_PREFIX):
-                    await self.handle_persist_cfg_cmd(decoded)
-                elif decoded.startswith(const.SET_ALL_LEDS_ON_CMD_PREFIX):
-                    self.handle_all_leds_on_cmd(decoded)
-                elif decoded.startswith(const.DISCONNECT_CMD):
-                    await self.handle_disconnect_cmd(decoded)
+                line = cmd[0:-2]
+                print("Received command: {}".format(line))
+
+                handled = self.dispatcher.dispatch(line)
+                if handled is not None:
+                    await handled
 
     async def main(self):
         asyncio.create_task(self.led_blink())
-        asyncio.create_task(self.basic_operation())
+        asyncio.create_task(self.display.writer())
+        asyncio.create_task(self.display.refresh())
+        self.display.fade_brightness(self.basic_viewer.config.bright_lvl)
+        self.basic_viewer.start()
         asyncio.create_task(self.recv_cmd())
         # asyncio.create_task(self.mem_monitor())
 
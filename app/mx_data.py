@@ -3,9 +3,13 @@
 import app.font as mx_font
 import app.constants as const
 import uasyncio as asyncio
+import framebuf
+from app.adt import LruCache
 from app.data import Score
+from app.text import MEDIUM_LAYOUT
 from app.hw import display, rtc
 from app.decorator import singleton
+from utime import ticks_ms, ticks_diff
 
 class MxRenderable:
     """
@@ -13,143 +17,192 @@ class MxRenderable:
     on the matrix display.
     """
 
-    def render(self, x_shift=0, pre_clear=True, redraw=True):
+    def draw(self, fb, x_shift=0):
+        """
+        Draw the information into a framebuffer, e.g. an off-screen one.
+        The framebuffer isn't cleared before.
+        """
         pass
 
+    def render(self, x_shift=0, pre_clear=True, redraw=True):
+        if pre_clear:
+            display.fill(0)
+
+        self.draw(display.fb, x_shift)
+
+        if redraw:
+            display.present()
+
+    def zone_key(self, zone_name: str):
+        """
+        Get a value which changes whenever the part of the information
+        shown in the zone of the name (see app/zone.py) changes.
+        None means the zone is re-rendered only when marked dirty.
+        """
+        return None
+
 class MxNumeric(MxRenderable):
     """
     Represents a numeric information that could be directly rendered
     on the matrix display.
     """
 
+    # Width of the cached frame, wider for the numerics whose pixels
+    # reach beyond the display, to be scrolled into view
+    FRAME_WIDTH = display.WIDTH
+
     def __init__(self):
         self._matrix = display
 
-    def _render_2_digit_num(self, num, x_shift=0):
-        (tens, ones) = divmod(num, 10)
-        ft = mx_font.Medium()
-
-        for digit in [tens, ones]:
-            char = ft.get(str(digit))
-            char.x_shift(x_shift)
-            char.render(self._matrix.fb)
+        # Frame of the last drawn value, for numerics which change rarely
+        self._frame = None
+        self._frame_key = None
 
-            x_shift += const.COLS_IN_MATRIX
-
-class MxScore(MxNumeric):
-    """
-    Represents the whole score of both teams that could be rendered 
-    on a display.
-    """
-
-    ZERO_TENS_DIGIT = 0
-    ONE_TENS_DIGIT = 1
-
-    MIN_SCORE = 0
-    MAX_SCORE = 99
-
-    class SingleOneDigit(MxRenderable):
+    def _draw_cached(self, fb, x_shift, key):
         """
-        Represents 1 part (left or right) of one-digit-only score (0 - 9).
+        Draw the frame rendered by :func:`_render_frame`, re-rendering it
+        only if the key of the value changed since the last time.
         """
 
-        X_OFFSET = 4
-        X_OFFSET_FOR_1 = 7
+        if self._frame is None:
+            bytes_per_row = ((self.FRAME_WIDTH + const.ONE_BYTE - 1)
+                // const.ONE_BYTE)
+            self._frame = framebuf.FrameBuffer(
+                bytearray(bytes_per_row * self._matrix.HEIGHT),
+                self.FRAME_WIDTH, self._matrix.HEIGHT, framebuf.MONO_HLSB)
 
-        def __init__(self, digit, side):
-            self._digit = digit
-            self._side = side
-            self._matrix = display
+        if key != self._frame_key:
+            self._frame.fill(0)
+            self._render_frame(self._frame)
+            self._frame_key = key
 
-        def render(self, x_shift=0):
-            offset = x_shift
+        # Key 0 keeps the pixels around the frame untouched
+        fb.blit(self._frame, x_shift, 0, 0)
 
-            if self._digit == 1:
-                offset += self.X_OFFSET_FOR_1
-            else:
-                offset += self.X_OFFSET
+    def _render_frame(self, fb):
+        pass
 
-            if self._side == const.RIGHT:
-                offset += const.RIGHT_SIDE_X_OFFSET
+    def _render_2_digit_num(self, fb, num, x_shift=0):
+        (tens, ones) = divmod(num, 10)
 
-            font = mx_font.BigDigit()
+        mx_font.MEDIUM.get(str(tens)).render(fb, x_shift)
+        mx_font.MEDIUM.get(str(ones)).render(fb,
+            x_shift + const.COLS_IN_MATRIX)
 
-            renderable = font.get(self._digit)
-            renderable.x_shift(offset)
-            renderable.render(self._matrix.fb)
+class MxText(MxRenderable):
+    """
+    Represents a text label, e.g. a team name, that could be directly
+    rendered on the matrix display. Text narrower than the display
+    is centered.
+    The Medium font has just the digits, the degree sign and the letters
+    A, C, J and S, other letters need to be added to the font first.
+    Raise ValueError, if the font of the layout misses a char of the text.
+    """
 
-    class SingleTwoDigit(MxRenderable):
-        """
-        Represents 1 part (left or right) of two-digit score,
-        where digit 1 is on the place of tens (score 10 - 19).
-        """
+    def __init__(self, text: str, layout=MEDIUM_LAYOUT):
+        if not layout.supports(text):
+            raise ValueError("Unsupported chars in text {}".format(
+                repr(text)))
 
-        TENS_X_OFFSET = 2
-        ONES_X_OFFSET = 6
-        ONES_X_OFFSET_FOR_1 = 12
+        self._matrix = display
+        self._layout = layout
+        self.text = text
 
-        def __init__(self, tens, ones, side):
-            self._tens = tens
-            self._ones = ones
-            self._side = side
-            self._matrix = display
+    @property
+    def width(self):
+        return self._layout.measure(self.text)
 
-        def render(self, x_shift=0):
-            tens_offset = x_shift
-            ones_offset = x_shift
+    def draw(self, fb, x_shift=0):
+        run = self._layout.layout(self.text)
+        if run.width < self._matrix.WIDTH:
+            x_shift += (self._matrix.WIDTH - run.width) // 2
+        run.render(fb, x_shift)
 
-            tens_offset += self.TENS_X_OFFSET
+def _big_font_score_layouts():
+    """
+    Get the layouts of one side of the score for the scores 0 - 19
+    in the big font. Each layout is a flat tuple of glyph and x offset
+    pairs.
+    """
 
-            if self._ones == 1:
-                ones_offset += self.ONES_X_OFFSET_FOR_1
-            else:
-                ones_offset += self.ONES_X_OFFSET
+    font = mx_font.BIG_DIGIT
+    layouts = []
 
-            if self._side == const.RIGHT:
-                tens_offset += const.RIGHT_SIDE_X_OFFSET
-                ones_offset += const.RIGHT_SIDE_X_OFFSET
+    for ones in range(10):
+        # One-digit score
+        layouts.append((font.get(ones), const.ONE_DIGIT_IS_1_X_OFFSET
+            if ones == 1 else const.ONE_DIGIT_X_OFFSET))
 
-            font = mx_font.BigDigit()
+    for ones in range(10):
+        # Digit 1 is on the place of tens
+        layouts.append((font.get(1), const.FIRST_DIGIT_X_OFFSET,
+            font.get(ones), const.SECOND_DIGIT_IS_1_X_OFFSET
+            if ones == 1 else const.SECOND_DIGIT_X_OFFSET))
 
-            renderable_ones = font.get(self._tens)
-            renderable_ones.x_shift(tens_offset)
-            renderable_ones.render(self._matrix.fb)
+    return tuple(layouts)
 
-            renderable_ones = font.get(self._ones)
-            renderable_ones.x_shift(ones_offset)
-            renderable_ones.render(self._matrix.fb)
+def _medium_font_score_layouts():
+    """
+    Get the layouts of one side of the score for the scores 0 - 99
+    in the medium font, always with two digits.
+    """
 
-    class SingleHigherTwoDigit(MxNumeric):
-        """
-        Represents 1 part (left or right) of two-digit score,
-        where digit higher than 1 is on the place of tens (score 20 - 99).
-        The main difference is in the used font, which is smaller
-        than the font used in classes represting score lower than 20.
-        The reason for that is that the digits of tens and ones would blend
-        on the display if a bigger font would be used.
-        """
+    font = mx_font.MEDIUM
 
-        RIGHT_SCORE_X_SHIFT = 18
+    return tuple((font.get(str(tens)), 0,
+        font.get(str(ones)), const.SECOND_DIGIT_MEDIUM_FONT_X_OFFSET)
+        for tens in range(10) for ones in range(10))
 
-        def __init__(self, single_score, side):
-            super().__init__()
+class MxScore(MxNumeric):
+    """
+    Represents the whole score of both teams that could be rendered 
+    on a display.
+    """
 
-            self._single_score = single_score
-            self._side = side
+    MIN_SCORE = 0
+    MAX_SCORE = 99
 
-        def render(self, x_shift=0):
-            if self._side == const.RIGHT:
-                x_shift += self.RIGHT_SCORE_X_SHIFT
+    # Keyframes of the score change animation
+    SHOW_OLD = 0
+    BLINK = 1
+    SHOW_NEW = 2
+
+    # Timeline of the score change animation: (keyframe, duration in ms)
+    CHANGE_TIMELINE = (
+        (SHOW_OLD, 200),
+        (BLINK, 200),
+        (SHOW_OLD, 200),
+        (SHOW_NEW, 400)
+    )
+
+    # Layouts of one side of the score (the left one), precomputed for
+    # each score value. The right side is shifted by a constant offset.
+    # Scores lower than 20 use the big font, unless the other side is 20
+    # or more. The big digits of tens and ones would blend on the display,
+    # so both sides switch to the medium font then.
+    BIG_FONT_LAYOUTS = _big_font_score_layouts()
+    MEDIUM_FONT_LAYOUTS = _medium_font_score_layouts()
+
+    def __init__(self, cache_size=const.SCORE_FRAME_CACHE_SIZE) -> None:
+        """
+        Rendered frames of the recently shown scores are cached, so showing
+        the same score again is just a copy of its frame.
+        """
 
-            self._render_2_digit_num(self._single_score, x_shift)
-    
-    
-    def __init__(self) -> None:
         super().__init__()
 
         self.score = Score(0,0)
         self.timestamp: int = 0
 
+        self.frame_cache = LruCache(cache_size)
+
+        # Score change animation
+        self._change_task = None
+        self._shown_score = (0, 0)
+        self._changed_at = 0
+        # From the last change command to the frame with the final score
+        self.change_latency_ms = 0
+
     def set_score(self, l_val, r_val):
         self.set_left(l_val)
         self.set_right(r_val)
@@ -174,74 +227,186 @@ class MxScore(MxNumeric):
         if pre_clear:
             self._matrix.fill(0)
 
-        (l_tens, l_ones) = divmod(self.score.left, 10)
-        (r_tens, r_ones) = divmod(self.score.right, 10)
+        self.draw(self._matrix.fb, x_shift, render_delim)
 
-        if l_tens > self.ONE_TENS_DIGIT or r_tens > self.ONE_TENS_DIGIT:
-            l_score = self.SingleHigherTwoDigit(self.score.left, const.LEFT)
-            r_score = self.SingleHigherTwoDigit(self.score.right, const.RIGHT)
-        else:
-            if l_tens == self.ZERO_TENS_DIGIT:
-                l_score = self.SingleOneDigit(l_ones, const.LEFT)
-            else:
-                l_score = self.SingleTwoDigit(l_tens, l_ones, const.LEFT)
+        if redraw:
+            self._matrix.present()
+
+    def zone_key(self, zone_name: str):
+        # Both sides switch the font together
+        big_font_max = len(self.BIG_FONT_LAYOUTS)
+        big_font = (self.score.left < big_font_max
+            and self.score.right < big_font_max)
+
+        if zone_name == const.LEFT_ZONE:
+            return (self.score.left, big_font)
+        if zone_name == const.RIGHT_ZONE:
+            return (self.score.right, big_font)
+        return None
+
+    def draw(self, fb, x_shift=0, render_delim=True):
+        # Key 0 keeps the pixels around the score untouched
+        fb.blit(self._get_frame(self.score.left, self.score.right,
+            render_delim), x_shift, 0, 0)
+
+    def _get_frame(self, left, right, render_delim):
+        """
+        Get the frame of a score from the cache
+        or render it, if it isn't there.
+        """
 
-            if r_tens == self.ZERO_TENS_DIGIT:
-                r_score = self.SingleOneDigit(r_ones, const.RIGHT)
-            else:
-                r_score = self.SingleTwoDigit(r_tens, r_ones, const.RIGHT)
+        key = (left * (self.MAX_SCORE + 1) + right) << 1 | render_delim
+        frame = self.frame_cache.get(key)
+
+        if frame is None:
+            frame = framebuf.FrameBuffer(bytearray(len(self._matrix.buffer)),
+                self._matrix.WIDTH, self._matrix.HEIGHT, framebuf.MONO_HLSB)
+            self._render_frame(frame, left, right, render_delim)
+            self.frame_cache.put(key, frame)
+
+        return frame
+
+    def _render_frame(self, fb, left, right, render_delim):
+        big_font_max = len(self.BIG_FONT_LAYOUTS)
+
+        if left < big_font_max and right < big_font_max:
+            layouts = self.BIG_FONT_LAYOUTS
+            right_x_offset = const.RIGHT_SIDE_X_OFFSET
+        else:
+            layouts = self.MEDIUM_FONT_LAYOUTS
+            right_x_offset = const.RIGHT_SIDE_MEDIUM_FONT_X_OFFSET
 
-        l_score.render(x_shift)
+        self._render_layout(fb, layouts[left])
         if render_delim:
-            self._render_score_delimiter(x_shift)
-        r_score.render(x_shift)
+            self._render_score_delimiter(fb)
+        self._render_layout(fb, layouts[right], right_x_offset)
 
-        if redraw:
-            self._matrix.redraw_twice()
+    def _render_layout(self, fb, layout, x_shift=0):
+        for idx in range(0, len(layout), 2):
+            layout[idx].render(fb, layout[idx + 1] + x_shift)
 
-    def _render_score_delimiter(self, x_shift):
-        self._matrix.hline(15 + x_shift, 7, 2, 1)
-        self._matrix.hline(15 + x_shift, 8, 2, 1)
+    def _render_score_delimiter(self, fb):
+        fb.hline(15, 7, 2, 1)
+        fb.hline(15, 8, 2, 1)
 
-    async def render_change(self, l_val: int, r_val: int):
+    def change(self, l_val: int, r_val: int):
+        """
+        Set the new score and indicate it by the change animation running
+        as a task. If a previous change is still being animated, it's
+        cancelled and the animation starts over towards the latest score,
+        so a burst of changes animates only the final one.
+        Return the animation task.
         """
-        Indicate new score being set.
+
+        self._changed_at = ticks_ms()
+
+        if self._change_task is None:
+            self._shown_score = (self.score.left, self.score.right)
+        else:
+            self._change_task.cancel()
+
+        self.set_score(l_val, r_val)
+        self._change_task = asyncio.create_task(self._animate_change())
+
+        return self._change_task
+
+    def is_changing(self):
+        return self._change_task is not None
+
+    async def _animate_change(self):
+        """
+        Play the change timeline from the last fully shown score.
         If both sides are being changed, blink with the whole display.
         If one side is being changed, blink just with that score part.
         If the both values are the same, blink just with the delimiter.
         """
 
-        self.render()
-        await asyncio.sleep_ms(200)
-
-        if self.score.left != l_val:
-            if self.score.right != r_val:
-                self._matrix.fill(0)
-                self._matrix.redraw_twice()
+        (old_left, old_right) = self._shown_score
+        left = self.score.left
+        right = self.score.right
+
+        for (keyframe, duration_ms) in self.CHANGE_TIMELINE:
+            if keyframe == self.SHOW_OLD:
+                self._show(old_left, old_right)
+            elif keyframe == self.BLINK:
+                if old_left != left:
+                    if old_right != right:
+                        self._matrix.fill(0)
+                        self._matrix.present()
+                    else:
+                        self._matrix.clear_half(const.LEFT)
+                elif old_right != right:
+                    self._matrix.clear_half(const.RIGHT)
+                else:
+                    self._show(old_left, old_right, False)
             else:
-                self._matrix.clear_half(const.LEFT)
-        elif self.score.right != r_val:
-            self._matrix.clear_half(const.RIGHT)
-        else:
-            self.render(render_delim=False)
+                self._show(left, right)
+                self._shown_score = (left, right)
+                self.change_latency_ms = ticks_diff(ticks_ms(),
+                    self._changed_at)
 
-        await asyncio.sleep_ms(200)
-        self.render()
-        
-        self.set_score(l_val, r_val)
-        await asyncio.sleep_ms(200)
-        self.render()
-        await asyncio.sleep_ms(200)
+            await asyncio.sleep_ms(duration_ms)
 
-@singleton
-class MxDate(MxNumeric):
-    DAY_X_SHIFT = 18
-    DAY_ORDINAL_DOT_X_SHIFT = 18
+        self._change_task = None
+
+    def _show(self, left, right, render_delim=True):
+        self._matrix.fill(0)
+        self._matrix.fb.blit(self._get_frame(left, right, render_delim), 0, 0)
+        self._matrix.present()
+
+class MxClock(MxNumeric):
+    """
+    Represents a numeric information read from the Real Time Clock.
+    The RTC is read at most once per RTC_PULL_PERIOD_MS and the frame
+    is re-rendered only when the shown value changes.
+    """
 
     def __init__(self) -> None:
         super().__init__()
 
-        self.pull()
+        self._pulled_at = None
+        self._pull_if_due()
+
+    def pull(self):
+        pass
+
+    def invalidate(self):
+        """
+        Read the RTC again on the next render, e.g. after it was set.
+        """
+
+        self._pulled_at = None
+
+    def _pull_if_due(self):
+        now = ticks_ms()
+
+        if (self._pulled_at is None
+                or ticks_diff(now, self._pulled_at) >= const.RTC_PULL_PERIOD_MS):
+            self.pull()
+            self._pulled_at = now
+
+    def _seconds_to_change(self, datetime):
+        return 0
+
+    async def next_change(self):
+        """
+        This coroutine sleeps until the shown value changes,
+        so the caller can wake exactly when it needs to render again.
+        """
+
+        datetime = rtc.datetime()
+        await asyncio.sleep_ms(1000 * self._seconds_to_change(datetime))
+
+        # The value just changed, don't wait for the next pull period
+        self._pulled_at = None
+
+@singleton
+class MxDate(MxClock):
+    DAY_X_SHIFT = 18
+    DAY_ORDINAL_DOT_X_SHIFT = 18
+
+    # The ordinal dot of the month ends beyond the display
+    FRAME_WIDTH = 17 + DAY_ORDINAL_DOT_X_SHIFT
 
     def pull(self):
         """
@@ -253,38 +418,45 @@ class MxDate(MxNumeric):
         self._day = datetime[const.RTC_DATE_IDX]
         self._month = datetime[const.RTC_MONTH_IDX]
 
-    def render(self, x_shift=0, pre_clear=True, redraw=True):
+    def draw(self, fb, x_shift=0):
+        self._pull_if_due()
+        self._draw_cached(fb, x_shift, (self._month << 5) | self._day)
+
+    def zone_key(self, zone_name: str):
+        self._pull_if_due()
+
+        if zone_name == const.LEFT_ZONE:
+            return self._day
+        if zone_name == const.RIGHT_ZONE:
+            return self._month
+        return None
+
+    def _render_frame(self, fb):
         """
         Render the day and month with their ordinal dots. No year rendering.
         This is intended for rendering during basic operation mode.
         """
 
-        self.pull()
+        self._render_2_digit_num(fb, self._day)
+        self._render_ordinal_dot(fb)
+        self._render_2_digit_num(fb, self._month, self.DAY_X_SHIFT)
+        self._render_ordinal_dot(fb, self.DAY_ORDINAL_DOT_X_SHIFT)
 
-        if pre_clear:
-            self._matrix.fill(0)
+    def _render_ordinal_dot(self, fb, x_shift=0):
+        fb.hline(15 + x_shift, 13, 2, 1)
+        fb.hline(15 + x_shift, 14, 2, 1)
 
-        self._render_2_digit_num(self._day, x_shift)
-        self._render_ordinal_dot(x_shift)
-        self._render_2_digit_num(self._month, x_shift + self.DAY_X_SHIFT)
-        self._render_ordinal_dot(x_shift + self.DAY_ORDINAL_DOT_X_SHIFT)
-
-        if redraw:
-            self._matrix.redraw_twice()
-
-    def _render_ordinal_dot(self, x_shift=0):
-        self._matrix.hline(15 + x_shift, 13, 2, 1)
-        self._matrix.hline(15 + x_shift, 14, 2, 1)
+    def _seconds_to_change(self, datetime):
+        # Until the midnight
+        return (const.SECONDS_IN_DAY
+            - datetime[const.RTC_HOURS_IDX] * const.SECONDS_IN_HOUR
+            - datetime[const.RTC_MINUTES_IDX] * const.SECONDS_IN_MINUTE
+            - datetime[const.RTC_SECONDS_IDX])
 
 @singleton
-class MxTime(MxNumeric):
+class MxTime(MxClock):
     MINUTES_X_SHIFT = 18
 
-    def __init__(self) -> None:
-        super().__init__()
-        
-        self.pull()
-
     def pull(self):
         """
         Fetch the time from the Real Time Clock module.
@@ -295,26 +467,30 @@ class MxTime(MxNumeric):
         self._hours = datetime[const.RTC_HOURS_IDX]
         self._minutes = datetime[const.RTC_MINUTES_IDX]
 
-    def render(self, x_shift=0, pre_clear=True, redraw=True):
-        """
-        This method pulls the actual time from the RTC module before rendering.
-        """
-
-        self.pull()
-
-        if pre_clear:
-            self._matrix.fill(0)
-
-        self._render_2_digit_num(self._hours, x_shift)
-        self._render_time_delimiter(x_shift)
-        self._render_2_digit_num(self._minutes, x_shift + self.MINUTES_X_SHIFT)
-
-        if redraw:
-            self._matrix.redraw_twice()
-
-    def _render_time_delimiter(self, x_shift=0):
-        self._matrix.hline(15 + x_shift, 4, 2, 1)
-        self._matrix.hline(15 + x_shift, 5, 2, 1)
-        self._matrix.hline(15 + x_shift, 10, 2, 1)
-        self._matrix.hline(15 + x_shift, 11, 2, 1)
-
+    def draw(self, fb, x_shift=0):
+        self._pull_if_due()
+        self._draw_cached(fb, x_shift, self._hours * 60 + self._minutes)
+
+    def zone_key(self, zone_name: str):
+        self._pull_if_due()
+
+        if zone_name == const.LEFT_ZONE:
+            return self._hours
+        if zone_name == const.RIGHT_ZONE:
+            return self._minutes
+        return None
+
+    def _render_frame(self, fb):
+        self._render_2_digit_num(fb, self._hours)
+        self._render_time_delimiter(fb)
+        self._render_2_digit_num(fb, self._minutes, self.MINUTES_X_SHIFT)
+
+    def _render_time_delimiter(self, fb, x_shift=0):
+        fb.hline(15 + x_shift, 4, 2, 1)
+        fb.hline(15 + x_shift, 5, 2, 1)
+        fb.hline(15 + x_shift, 10, 2, 1)
+        fb.hline(15 + x_shift, 11, 2, 1)
+
+    def _seconds_to_change(self, datetime):
+        # Until the next minute
+        return const.SECONDS_IN_MINUTE - datetime[const.RTC_SECONDS_IDX]
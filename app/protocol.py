@@ -0,0 +1,246 @@
+# Author: Marek Jankech
+
+try:
+    import ustruct as struct
+except ImportError:
+    # Host tools, e.g. tools/dispatch_bench.py
+    import struct
+import app.constants as const
+
+MINUS = ord("-")
+ZERO = ord("0")
+ONE = ord("1")
+NINE = ord("9")
+
+class Dispatcher:
+    def __init__(self):
+        """
+        Dispatches the received command lines to their handlers
+        by a dict lookup of the command token. The token is the line
+        up to the '=' inclusive, or the whole line for the commands
+        without a value.
+        The line stays in its received buffer, the handlers get
+        a memoryview of the value after the token.
+        """
+
+        # token: (handler, validator)
+        self._handlers = {}
+
+    def register(self, token: str, handler, validator=None):
+        """
+        Register the handler of the command. The optional validator
+        gets the value as well and raises ValueError, if it's invalid,
+        see :func:`validate`.
+        """
+
+        self._handlers[token.encode("ascii")] = (handler, validator)
+
+    def dispatch(self, line):
+        """
+        Call the handler of the command line without the line ending.
+        Return what the handler returns, e.g. a coroutine to be awaited.
+        Return None, if the command is unknown.
+        """
+
+        (token, value_idx) = self._split(line)
+
+        entry = self._handlers.get(token)
+        if entry is None:
+            print("Unknown command: {}".format(token))
+            return None
+
+        return entry[0](memoryview(line)[value_idx:])
+
+    def validate(self, line):
+        """
+        Check the command line without calling its handler.
+        Raise ValueError, if the command is unknown or its value invalid.
+        """
+
+        (token, value_idx) = self._split(line)
+
+        entry = self._handlers.get(token)
+        if entry is None:
+            raise ValueError("Unknown command {}".format(token))
+
+        if entry[1] is not None:
+            entry[1](memoryview(line)[value_idx:])
+
+    def _split(self, line):
+        value_idx = line.find(b"=") + 1
+        if value_idx == 0:
+            return (line, len(line))
+        return (line[:value_idx], value_idx)
+
+def parse_ints(buf, delimiters=""):
+    """
+    Parse the integers separated by the delimiters from the buffer,
+    e.g. the delimiters ":T" for "12:7T1729170000000".
+    The whole buffer has to be consumed.
+    Raise ValueError, if the buffer doesn't match.
+    """
+
+    values = []
+    idx = 0
+    end = len(buf)
+
+    for field_idx in range(len(delimiters) + 1):
+        negative = idx < end and buf[idx] == MINUS
+        if negative:
+            idx += 1
+
+        start = idx
+        value = 0
+        while idx < end and ZERO <= buf[idx] <= NINE:
+            value = value * 10 + buf[idx] - ZERO
+            idx += 1
+
+        if idx == start:
+            raise ValueError("Digit expected at {}".format(idx))
+        values.append(-value if negative else value)
+
+        if field_idx < len(delimiters):
+            if idx == end or buf[idx] != ord(delimiters[field_idx]):
+                raise ValueError("'{}' expected at {}".format(
+                    delimiters[field_idx], idx))
+            idx += 1
+
+    if idx != end:
+        raise ValueError("Unexpected data at {}".format(idx))
+
+    return values
+
+def parse_bool(buf):
+    """Parse "1" or "0", return None for anything else."""
+
+    if len(buf) != 1:
+        return None
+    if buf[0] == ONE:
+        return True
+    if buf[0] == ZERO:
+        return False
+    return None
+
+class BinaryProtocol:
+    # Sync, opcode and payload length
+    HEADER_LEN = 3
+    CHECKSUM_LEN = 1
+
+    def __init__(self, max_payload_len=const.BIN_MAX_PAYLOAD_LEN):
+        """
+        Compact binary framing of the commands, negotiated
+        by a handshake. The frames are read into and written from
+        preallocated buffers, the fixed-width fields are packed
+        by struct.
+        """
+
+        frame_len = self.HEADER_LEN + max_payload_len + self.CHECKSUM_LEN
+        self._rx = bytearray(frame_len)
+        self._rx_view = memoryview(self._rx)
+        self._tx = bytearray(frame_len)
+        self._max_payload_len = max_payload_len
+
+        # opcode: (payload format, payload length, handler)
+        self._handlers = {}
+
+    def register(self, opcode: int, fmt: str, handler):
+        size = struct.calcsize(fmt)
+        if size > self._max_payload_len:
+            raise ValueError("Payload too long for opcode {}".format(opcode))
+        self._handlers[opcode] = (fmt, size, handler)
+
+    async def read_frame(self, reader):
+        """
+        Read the rest of a frame, whose sync byte was already read.
+        Return the opcode, or None if the frame is malformed.
+        """
+
+        self._rx[0] = const.BIN_SYNC
+        await self._read_into(reader, self._rx_view[1:self.HEADER_LEN])
+
+        length = self._rx[2]
+        if length > self._max_payload_len:
+            # Skip the payload and checksum, so they aren't taken
+            # for the next frames
+            await self._skip(reader, length + self.CHECKSUM_LEN)
+            return None
+
+        end = self.HEADER_LEN + length + self.CHECKSUM_LEN
+        await self._read_into(reader, self._rx_view[self.HEADER_LEN:end])
+
+        if checksum(self._rx, 1, end - 1) != self._rx[end - 1]:
+            return None
+        return self._rx[1]
+
+    async def _read_into(self, reader, buf):
+        read = 0
+        while read < len(buf):
+            read += await reader.readinto(buf[read:])
+
+    async def _skip(self, reader, count):
+        while count > 0:
+            chunk = min(count, len(self._rx))
+            await self._read_into(reader, self._rx_view[:chunk])
+            count -= chunk
+
+    def dispatch(self, opcode: int):
+        """
+        Call the handler of the frame read by :func:`read_frame`
+        with the unpacked payload fields. Return what the handler returns,
+        e.g. a coroutine to be awaited.
+        Raise ValueError, if the opcode is unknown or the payload length
+        doesn't match its format.
+        """
+
+        entry = self._handlers.get(opcode)
+        if entry is None:
+            raise ValueError("Unknown opcode {}".format(opcode))
+
+        (fmt, size, handler) = entry
+        if self._rx[2] != size:
+            raise ValueError("Invalid payload length for opcode {}".format(
+                opcode))
+
+        return handler(*struct.unpack_from(fmt, self._rx, self.HEADER_LEN))
+
+    def pack(self, opcode: int, fmt: str, *values):
+        """
+        Pack a frame into the transmit buffer.
+        Return the buffer and the frame length.
+        """
+
+        size = struct.calcsize(fmt)
+        self._tx[0] = const.BIN_SYNC
+        self._tx[1] = opcode
+        self._tx[2] = size
+        struct.pack_into(fmt, self._tx, self.HEADER_LEN, *values)
+
+        end = self.HEADER_LEN + size
+        self._tx[end] = checksum(self._tx, 1, end)
+
+        return (self._tx, end + self.CHECKSUM_LEN)
+
+def check_datetime(year, month, day, weekday, hour, minute, second):
+    """Raise ValueError, if the fields don't make a valid date and time."""
+
+    if not 1 <= month <= 12:
+        raise ValueError("Invalid month {}".format(month))
+
+    days_in_month = const.DAYS_IN_MONTH[month - 1]
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        days_in_month += 1
+
+    if not 1 <= day <= days_in_month:
+        raise ValueError("Invalid day {}".format(day))
+    if not 0 <= weekday <= 6:
+        raise ValueError("Invalid weekday {}".format(weekday))
+    if not (0 <= hour < 24 and 0 <= minute < 60 and 0 <= second < 60):
+        raise ValueError("Invalid time {}:{}:{}".format(hour, minute, second))
+
+def checksum(buf, start, end):
+    """XOR of the bytes of the buffer from start to end exclusive."""
+
+    result = 0
+    for idx in range(start, end):
+        result ^= buf[idx]
+    return result
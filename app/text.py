@@ -0,0 +1,117 @@
+# Author: Marek Jankech
+
+import app.constants as const
+import app.font as mx_font
+from app.adt import LruCache
+
+class GlyphRun:
+    __slots__ = ("glyphs", "offsets", "width")
+
+    def __init__(self, glyphs, offsets, width):
+        """
+        Represents a laid out text: glyphs with their x offsets
+        from the start of the text and the total width.
+        """
+
+        self.glyphs = glyphs
+        self.offsets = offsets
+        self.width = width
+
+    def render(self, framebuf, x_offset=0, y_offset=0):
+        for idx in range(len(self.glyphs)):
+            self.glyphs[idx].render(framebuf, x_offset + self.offsets[idx],
+                y_offset)
+
+
+class TextLayout:
+    def __init__(self, font, kerning=None,
+            cache_size=const.TEXT_LAYOUT_CACHE_SIZE):
+        """
+        Lays out strings in a font. Each char advances by the advance
+        of its glyph, corrected by the kerning of the pair of chars,
+        if there's any. The space takes the SPACE_ADVANCE and renders
+        nothing. Other chars which the font doesn't contain are laid out
+        the same way, but a warning is printed, see :func:`supports`.
+        Layouts of the recently used strings are kept, so a text
+        rendered in every frame of a scroll is laid out just once.
+        """
+
+        self._font = font
+        self._kerning = kerning if kerning is not None else {}
+        self._cache = LruCache(cache_size)
+
+    def layout(self, text: str):
+        run = self._cache.get(text)
+
+        if run is None:
+            run = self._layout(text)
+            self._cache.put(text, run)
+
+        return run
+
+    def measure(self, text: str):
+        return self.layout(text).width
+
+    def supports(self, text: str):
+        """
+        Return True, if the font contains all the chars of the text,
+        except spaces.
+        """
+
+        for char in text:
+            if char != " " and self._get_glyph(char) is None:
+                return False
+        return True
+
+    def _get_glyph(self, char):
+        try:
+            return self._font.get(char)
+        except KeyError:
+            return None
+
+    def _layout(self, text):
+        glyphs = []
+        offsets = []
+        x = 0
+        prev_char = None
+
+        for char in text:
+            if prev_char is not None:
+                x += self._kerning.get(prev_char + char, 0)
+
+            glyph = self._get_glyph(char)
+
+            if glyph is None:
+                if char != " ":
+                    print("No glyph for {}, laid out as a space".format(
+                        repr(char)))
+                x += const.SPACE_ADVANCE
+            else:
+                glyphs.append(glyph)
+                offsets.append(x)
+                x += glyph.advance
+
+            prev_char = char
+
+        # The spacing after the last glyph isn't part of the text
+        width = x
+        if glyphs and offsets[-1] + glyphs[-1].advance == x:
+            width = offsets[-1] + glyphs[-1].width
+
+        return GlyphRun(tuple(glyphs), tuple(offsets), width)
+
+
+# Kerning of the Medium font pairs, in points. The digit 1 has its ink
+# in the middle of the glyph, so the gaps around it are too wide.
+MEDIUM_KERNING = {
+    "A1": -2,
+    "C1": -2,
+    "J1": -2,
+    "S1": -2,
+    "1A": -1,
+    "1C": -1,
+    "1J": -1,
+    "1S": -1
+}
+
+MEDIUM_LAYOUT = TextLayout(mx_font.MEDIUM, MEDIUM_KERNING)
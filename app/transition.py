@@ -0,0 +1,163 @@
+# Author: Marek Jankech
+
+import app.constants as const
+from app.display import Matrix
+
+BYTES_PER_ROW = Matrix.WIDTH // const.ONE_BYTE
+FRAME_LEN = BYTES_PER_ROW * Matrix.HEIGHT
+
+UP = 1
+DOWN = 2
+
+class Transition:
+    """
+    Abstract class represents a transition effect between two frames
+    of the display. Everything an effect needs per step is precomputed,
+    so each step is just a byte-level combination of the two frames.
+    """
+
+    steps = 1
+
+    def combine(self, out, frame_from, frame_to, step):
+        """
+        Combine the frames into the output buffer for a step
+        between 1 and :attr:`steps` - 1.
+        """
+        pass
+
+    async def play(self, display: Matrix, frame_from, frame_to, frame_clock):
+        """
+        This coroutine plays the transition on the display, paced
+        by the frame clock. It always ends with the target frame shown.
+        """
+
+        step = 1
+        frame_clock.start()
+
+        while step < self.steps:
+            self.combine(display.buffer, frame_from, frame_to, step)
+            await display.present_async()
+
+            step += await frame_clock.tick()
+
+        display.buffer[:] = frame_to
+        await display.present_async()
+
+
+class MaskTransition(Transition):
+    """
+    Takes the pixels of the target frame where the mask of the step
+    is set and the pixels of the source frame elsewhere.
+    """
+
+    def __init__(self, masks):
+        self._masks = masks
+        self._mask_len = len(masks[0])
+        self.steps = len(masks) + 1
+
+    def combine(self, out, frame_from, frame_to, step):
+        mask = self._masks[step - 1]
+        mask_len = self._mask_len
+
+        for idx in range(FRAME_LEN):
+            bits = mask[idx % mask_len]
+            out[idx] = (frame_from[idx] & ~bits) | (frame_to[idx] & bits)
+
+
+class Wipe(MaskTransition):
+    def __init__(self, direction=const.LEFT):
+        """
+        The target frame is revealed column by column. Moving to the left
+        it's revealed from the right edge, moving to the right from
+        the left edge. The masks are one row of the display.
+        """
+
+        masks = []
+
+        for revealed in range(1, Matrix.WIDTH):
+            mask = bytearray(BYTES_PER_ROW)
+            for col in range(revealed):
+                x = Matrix.WIDTH - 1 - col if direction == const.LEFT else col
+                mask[x // const.ONE_BYTE] |= 0x80 >> (x % const.ONE_BYTE)
+            masks.append(bytes(mask))
+
+        super().__init__(masks)
+
+
+class Dissolve(MaskTransition):
+    # Parameters of the linear congruential generator
+    LCG_MULTIPLIER = 1103515245
+    LCG_INCREMENT = 12345
+    LCG_MASK = 0x7FFFFFFF
+
+    def __init__(self, steps=16, seed=1):
+        """
+        The target frame appears in random pixels. The pixel order
+        is shuffled once with a fixed seed, so the effect is the same
+        every time and doesn't depend on the random module.
+        """
+
+        pixels = Matrix.WIDTH * Matrix.HEIGHT
+        order = list(range(pixels))
+        state = seed
+
+        for idx in range(pixels - 1, 0, -1):
+            state = (state * self.LCG_MULTIPLIER
+                + self.LCG_INCREMENT) & self.LCG_MASK
+            swap_idx = state % (idx + 1)
+            (order[idx], order[swap_idx]) = (order[swap_idx], order[idx])
+
+        masks = []
+        mask = bytearray(FRAME_LEN)
+        revealed = 0
+
+        for step in range(1, steps):
+            target = step * pixels // steps
+            while revealed < target:
+                (y, x) = divmod(order[revealed], Matrix.WIDTH)
+                mask[y * BYTES_PER_ROW + x // const.ONE_BYTE] |= (
+                    0x80 >> (x % const.ONE_BYTE))
+                revealed += 1
+            masks.append(bytes(mask))
+
+        super().__init__(masks)
+
+
+class VerticalSlide(Transition):
+    def __init__(self, direction=UP):
+        """
+        The source frame slides out vertically, pushed by the target one.
+        Each step is a row shift, i.e. two copies of whole rows.
+        """
+
+        self._direction = direction
+        self.steps = Matrix.HEIGHT
+
+    def combine(self, out, frame_from, frame_to, step):
+        out_view = memoryview(out)
+        split = step * BYTES_PER_ROW
+
+        if self._direction == UP:
+            out_view[:FRAME_LEN - split] = memoryview(frame_from)[split:]
+            out_view[FRAME_LEN - split:] = memoryview(frame_to)[:split]
+        else:
+            out_view[:split] = memoryview(frame_to)[FRAME_LEN - split:]
+            out_view[split:] = memoryview(frame_from)[:FRAME_LEN - split]
+
+
+# Factories of the transitions by their names. The effects precompute
+# their tables, so they're built only when selected.
+TRANSITIONS = {
+    "wipe_left": lambda: Wipe(const.LEFT),
+    "wipe_right": lambda: Wipe(const.RIGHT),
+    "slide_up": lambda: VerticalSlide(UP),
+    "slide_down": lambda: VerticalSlide(DOWN),
+    "dissolve": lambda: Dissolve()
+}
+
+def get_transition(name):
+    """Build the transition registered by the name, None for a hard cut."""
+
+    if name is None:
+        return None
+    return TRANSITIONS[name]()
@@ -0,0 +1,121 @@
+# Author: Marek Jankech
+
+import app.constants as const
+
+class Transport:
+	"""
+	Abstract class represents the channel to the chain of cascaded MAX7219
+	drivers, which the matrix display writes through.
+	"""
+
+	def select(self):
+		"""Start a CS frame."""
+		pass
+
+	def deselect(self):
+		"""End a CS frame, the drivers latch the data."""
+		pass
+
+	def write(self, buf):
+		"""Shift the bytes out within the current CS frame."""
+		pass
+
+	def write_register(self, register_add, data):
+		"""Write the same value to a register of all the cascaded drivers."""
+
+		self.write_block(
+			bytes([register_add, data]) * const.CASCADED_MATRIXES)
+
+	def write_block(self, buf):
+		"""
+		Send a block of (register, data) pairs, one for each of the cascaded
+		drivers, in a single CS frame.
+		"""
+
+		self.select()
+		self.write(buf)
+		self.deselect()
+
+
+class SpiTransport(Transport):
+	def __init__(self, spi, cs_pin):
+		"""
+		Transport over the hardware SPI with a chip select pin.
+		"""
+
+		self.spi = spi
+		self.cs_pin = cs_pin
+
+	def select(self):
+		self.cs_pin.value(0)
+
+	def deselect(self):
+		self.cs_pin.value(1)
+
+	def write(self, buf):
+		self.spi.write(buf)
+
+
+class RecordingTransport(Transport):
+	def __init__(self):
+		"""
+		In-memory transport, which decodes the MAX7219 register traffic
+		instead of sending it anywhere. It keeps the digit (row) registers
+		of each driver as a bitmap and the other registers by address.
+		It doesn't need any hardware, so it can be used to measure
+		and check the display output off the device.
+		Driver index is the position of its pair in the CS frame.
+		"""
+
+		self.rows = [bytearray(const.ROWS_IN_MATRIX)
+			for _ in range(const.CASCADED_MATRIXES)]
+		self.registers = [{} for _ in range(const.CASCADED_MATRIXES)]
+
+		self.bytes_written = 0
+		self.frames = 0
+
+		self._pending = bytearray()
+
+	def reset_counters(self):
+		self.bytes_written = 0
+		self.frames = 0
+
+	def select(self):
+		self._pending = bytearray()
+
+	def deselect(self):
+		self.frames += 1
+		pending = self._pending
+
+		for chip_idx in range(min(len(pending) // 2, const.CASCADED_MATRIXES)):
+			register_add = pending[2 * chip_idx]
+			data = pending[2 * chip_idx + 1]
+
+			if register_add == const.NOOP:
+				continue
+			if const.ROW0 <= register_add < const.ROW0 + const.ROWS_IN_MATRIX:
+				self.rows[chip_idx][register_add - const.ROW0] = data
+			else:
+				self.registers[chip_idx][register_add] = data
+
+	def write(self, buf):
+		self.bytes_written += len(buf)
+		self._pending.extend(buf)
+
+	def frame(self):
+		"""
+		Compose the rows of all the drivers into a MONO_HLSB buffer
+		with the same layout as :attr:`Matrix.buffer`.
+		"""
+
+		buffer = bytearray(const.CASCADED_MATRIXES * const.ROWS_IN_MATRIX)
+
+		for chip_idx in range(const.CASCADED_MATRIXES):
+			(half, matrix_idx) = divmod(chip_idx, const.MATRIXES_IN_ROW)
+
+			for row_idx in range(const.ROWS_IN_MATRIX):
+				buf_idx = ((half * const.ROWS_IN_MATRIX + row_idx)
+					* const.MATRIXES_IN_ROW + matrix_idx)
+				buffer[buf_idx] = self.rows[chip_idx][row_idx]
+
+		return buffer
@@ -2,19 +2,18 @@
 
 import uasyncio as asyncio
 import ujson as json
+import framebuf
 import app.constants as const
 from app.adt import CircularList
 from app.hw import display
 from app.mx_data import MxRenderable, MxDate, MxTime
 from app.data import Config
+from app.frame_clock import FrameClock
+from app.transition import get_transition
+from app.zone import halves_compositor
 
 SPACE = 8
 
-FIVE_MILLIS = 5
-TEN_MILLIS = 10
-
-NO_VIEW = 0
-
 class BasicViewer:
     ONE_INFO_LEN = 32
     TWO_INFO = 2
@@ -22,24 +21,76 @@ class BasicViewer:
     SCROLL_MODE = 1
     ALTERNATE_MODE = 2
 
-    def __init__(self):
+    def __init__(self, score: MxRenderable):
+        """
+        Shows the basic information (score, time) on the display
+        in a task. The task sleeps until something it shows changes
+        and it's stopped by cancelling it.
+        """
+
         self.config = self._load_cfg()
+
+        # Paces the scrolling, its stats can be queried
+        self.frame_clock = FrameClock(const.SCROLL_FPS)
+
+        # Off-screen strip wide enough for two infos with a space between.
+        # Each info is drawn into it once per scroll, the scroll frames
+        # are just windows of the strip.
+        strip_width = 2 * self.ONE_INFO_LEN + SPACE
+        self._strip = framebuf.FrameBuffer(
+            bytearray(strip_width * display.HEIGHT // const.ONE_BYTE),
+            strip_width, display.HEIGHT, framebuf.MONO_HLSB)
+
+        # Effect used when alternating infos, None means a hard cut.
+        # The frames it blends are rendered off-screen.
+        self.transition = get_transition(const.ALTERNATE_TRANSITION)
+        self._from_frame = bytearray(len(display.buffer))
+        self._to_frame = bytearray(len(display.buffer))
+        self._to_fb = framebuf.FrameBuffer(self._to_frame,
+            display.WIDTH, display.HEIGHT, framebuf.MONO_HLSB)
+
+        # A single info is composed by halves, so e.g. a minute tick
+        # of the clock re-renders just the minutes
+        self.compositor = halves_compositor()
         
-        self.score = None
+        self.score = score
         self._to_render = []
+        self._view_mode = self.ALTERNATE_MODE
 
-        self._set_rendering_options()
+        # Generation of the config the rendering options are set for
+        self._config_gen = None
+        self._changed = asyncio.Event()
+        self._task = None
 
-    def disable(self):
-        self._view_mode = NO_VIEW
+    def start(self):
+        """Start viewing, unless the viewer is already running."""
 
-    async def view_info(self):
-        self._set_rendering_options()
+        if self._task is None:
+            self._task = asyncio.create_task(self._view_info())
 
-        if self._view_mode == self.SCROLL_MODE:
-            await self._scroll()
-        else:
-            await self._alternate()
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def notify(self):
+        """
+        Wake the viewer, because the config or a shown info has changed.
+        """
+
+        self._changed.set()
+
+    async def _view_info(self):
+        while True:
+            self._set_rendering_options()
+            self._changed.clear()
+
+            if not self._to_render:
+                await self._changed.wait()
+            elif self._view_mode == self.SCROLL_MODE:
+                await self._scroll()
+            else:
+                await self._alternate()
 
     def _load_cfg(self):
         config = Config(True, False, False, const.INITIAL_BRIGHTNESS)
@@ -55,11 +106,20 @@ class BasicViewer:
                   "Using default configuration: {}".format(config))
             
         return config
+
+    def _config_changed(self):
+        return self._config_gen != self.config.generation
     
     def _set_rendering_options(self):
-        self._to_render = []
+        """
+        Apply the config, only if it changed since the last time.
+        """
+
+        if not self._config_changed():
+            return
+        self._config_gen = self.config.generation
 
-        display.set_brightness(self.config.bright_lvl)
+        self._to_render = []
 
         if self.config.use_score and self.score is not None:
             self._to_render.append(self.score)
@@ -75,36 +135,108 @@ class BasicViewer:
         """
         This couroutine can alternate multiple text information on the display
         based on loaded configuration from the memory.
-        It loops through a circular list of renderable info, so unless 
-        :func:`disable` is called, it never ends.
+        It loops through a circular list of renderable info, until
+        the config changes. A single info is shown by :func:`_show_zoned`.
+        """
+
+        if len(self._to_render) == 1:
+            await self._show_zoned(self._to_render[0])
+            return
+
+        circular_to_render = CircularList(self._to_render)
+        shown = None
+
+        while not self._config_changed():
+            obj = circular_to_render.next()
+            if self.transition is not None and shown not in (None, obj):
+                await self._transit(obj)
+            else:
+                obj.render(redraw=False)
+                await display.present_async()
+            shown = obj
+
+            try:
+                await asyncio.wait_for_ms(self._changed.wait(),
+                    const.ALTERNATE_PERIOD_MS)
+            except asyncio.TimeoutError:
+                pass
+
+            self._changed.clear()
+
+    async def _show_zoned(self, obj: MxRenderable):
+        """
+        Show a single info through the compositor, until the config
+        changes. Only the zones whose part of the info changed
+        are rendered again.
+        """
+
+        self.compositor.bind(obj)
+        # Something else could have been drawn on the display meanwhile,
+        # e.g. the score change animation
+        self.compositor.mark_dirty()
+
+        while not self._config_changed():
+            if self.compositor.compose():
+                await display.present_async()
+
+            await self._wait_change(obj, self.compositor.ms_to_next_due())
+            self._changed.clear()
+
+    async def _transit(self, obj: MxRenderable):
+        """
+        Replace the shown frame by the info using the transition effect.
         """
 
-        if self._to_render:
-            circular_to_render = CircularList(self._to_render)
+        self._from_frame[:] = display.buffer
+        self._to_fb.fill(0)
+        obj.draw(self._to_fb)
 
-            while self._view_mode == self.ALTERNATE_MODE:
-                circular_to_render.next().render()
-                await asyncio.sleep_ms(2000)
+        await self.transition.play(display, self._from_frame,
+            self._to_frame, self.frame_clock)
+
+    async def _wait_change(self, obj: MxRenderable, timeout_ms=None):
+        """
+        Sleep until the viewer is notified or the info changes by itself,
+        like the time does, at most for the timeout, if there's any.
+        """
+
+        waker = None
+        if hasattr(obj, "next_change"):
+            waker = asyncio.create_task(self._notify_after(obj.next_change()))
+
+        try:
+            if timeout_ms is None:
+                await self._changed.wait()
+            else:
+                await asyncio.wait_for_ms(self._changed.wait(), timeout_ms)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if waker is not None:
+                waker.cancel()
+
+    async def _notify_after(self, awaitable):
+        await awaitable
+        self.notify()
 
     async def _scroll(self):
         """
         This couroutine can scroll multiple text information on the display
         based on loaded configuration from the memory.
-        It loops through a circular list of renderable info, so unless 
-        :func:`disable` is called, it never ends.
+        It loops through a circular list of renderable info, until
+        the config changes.
         """
 
-        if self._to_render:
-            circular_to_render = CircularList(self._to_render)
+        circular_to_render = CircularList(self._to_render)
 
-            obj1 = circular_to_render.next()
-            await self._scroll_basic_info_1(obj1)
+        obj1 = circular_to_render.next()
+        await self._scroll_basic_info_1(obj1)
 
-            while self._view_mode == self.SCROLL_MODE:
-                obj2 = circular_to_render.next()
-                await self._scroll_basic_info_2(obj1, obj2)
+        while not self._config_changed():
+            obj2 = circular_to_render.next()
+            await self._scroll_basic_info_2(obj1, obj2)
 
-                obj1 = obj2
+            obj1 = obj2
 
     async def _scroll_basic_info_1(self, obj: MxRenderable):
         """
@@ -113,13 +245,22 @@ class BasicViewer:
         Only one text info is displayed.
         """
 
-        for x_shift in range(self.ONE_INFO_LEN, 0, -1):
-            if self._view_mode != self.SCROLL_MODE:
+        # The info enters from the right, the strip is empty before it
+        strip_x_shift = SPACE + self.ONE_INFO_LEN
+        self._strip.fill(0)
+        obj.draw(self._strip, strip_x_shift)
+
+        x_shift = self.ONE_INFO_LEN
+        self.frame_clock.start()
+
+        while x_shift > 0:
+            if self._config_changed():
                 break
             
-            obj.render(x_shift)
+            display.fb.blit(self._strip, x_shift - strip_x_shift, 0)
+            await display.present_async()
 
-            await asyncio.sleep_ms(TEN_MILLIS)
+            x_shift -= await self.frame_clock.tick()
 
     async def _scroll_basic_info_2(self, obj1: MxRenderable, obj2: MxRenderable):
         """
@@ -129,15 +270,20 @@ class BasicViewer:
         ends with the second text info displayed.
         """
 
-        for x_shift in range(0, -(SPACE + self.ONE_INFO_LEN), -1):
-            if self._view_mode != self.SCROLL_MODE:
+        self._strip.fill(0)
+        obj1.draw(self._strip)
+        obj2.draw(self._strip, SPACE + self.ONE_INFO_LEN)
+
+        x_shift = 0
+        self.frame_clock.start()
+
+        while x_shift > -(SPACE + self.ONE_INFO_LEN):
+            if self._config_changed():
                 break
             
-            display.fill(0)
-
-            obj1.render(x_shift, False, False)
-            obj2.render(x_shift + SPACE + self.ONE_INFO_LEN, False, False)
+            # The strip covers the whole display, no need to clear it
+            display.fb.blit(self._strip, x_shift, 0)
 
-            display.redraw_twice()
+            await display.present_async()
 
-            await asyncio.sleep_ms(FIVE_MILLIS)
+            x_shift -= await self.frame_clock.tick()
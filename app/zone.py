@@ -0,0 +1,170 @@
+# Author: Marek Jankech
+
+import framebuf
+import app.constants as const
+from app.hw import display
+from app.mx_data import MxRenderable
+from utime import ticks_ms, ticks_diff
+
+BYTES_PER_ROW = display.WIDTH // const.ONE_BYTE
+
+class Zone:
+    def __init__(self, name: str, x: int, y: int, width: int, height: int,
+        renderable: MxRenderable = None, period_ms: int = 0):
+        """
+        Named rectangle of the display bound to a renderable.
+        The renderable draws the whole display as usual, only the pixels
+        inside the rectangle are taken from it.
+        The zone is re-rendered when it's marked dirty, when the zone key
+        of the renderable changes (see :func:`MxRenderable.zone_key`)
+        or every period_ms, period 0 means no periodic re-rendering.
+        """
+
+        self.name = name
+        self.renderable = renderable
+        self.period_ms = period_ms
+        self.dirty = True
+        self.renders = 0
+        self._rendered_at = None
+        self._key = None
+
+        # (buffer index, bit mask) of every byte the rectangle covers
+        self._masks = []
+
+        for row in range(y, y + height):
+            for byte_idx in range(x // const.ONE_BYTE,
+                    (x + width - 1) // const.ONE_BYTE + 1):
+                bits = 0
+                for col in range(byte_idx * const.ONE_BYTE,
+                        (byte_idx + 1) * const.ONE_BYTE):
+                    if x <= col < x + width:
+                        bits |= 0x80 >> (col % const.ONE_BYTE)
+                self._masks.append((row * BYTES_PER_ROW + byte_idx, bits))
+
+    def ms_to_due(self, now):
+        """
+        Get the time until the zone has to be re-rendered periodically,
+        None if never.
+        """
+
+        if self.dirty:
+            return 0
+        if self.period_ms == 0:
+            return None
+
+        return max(0, self.period_ms - ticks_diff(now, self._rendered_at))
+
+    def is_due(self, now):
+        if self.ms_to_due(now) == 0:
+            return True
+        return self.renderable.zone_key(self.name) != self._key
+
+    def compose(self, buffer, scratch, scratch_fb, now):
+        """
+        Render the renderable off-screen and copy the pixels inside
+        the rectangle into the buffer.
+        """
+
+        self._key = self.renderable.zone_key(self.name)
+
+        scratch_fb.fill(0)
+        self.renderable.draw(scratch_fb)
+
+        for (idx, bits) in self._masks:
+            buffer[idx] = (buffer[idx] & ~bits) | (scratch[idx] & bits)
+
+        self.dirty = False
+        self._rendered_at = now
+        self.renders += 1
+
+class Compositor:
+    def __init__(self):
+        """
+        Composes the display buffer from independent zones. Only the zones
+        which are due are re-rendered. The rows of the chips the zones
+        didn't change aren't pushed, thanks to the dirty row tracking
+        of the display.
+        The owner of the display, i.e. the viewer, calls :func:`compose`
+        and presents the frame.
+        """
+
+        self.zones = {}
+
+        self._scratch = bytearray(len(display.buffer))
+        self._scratch_fb = framebuf.FrameBuffer(self._scratch,
+            display.WIDTH, display.HEIGHT, framebuf.MONO_HLSB)
+
+    def add(self, zone: Zone):
+        self.zones[zone.name] = zone
+
+    def remove(self, name: str):
+        del self.zones[name]
+
+    def bind(self, renderable: MxRenderable):
+        """
+        Bind all the zones to the renderable and mark them dirty,
+        unless they're bound to it already.
+        """
+
+        for zone in self.zones.values():
+            if zone.renderable is not renderable:
+                zone.renderable = renderable
+                zone.dirty = True
+
+    def mark_dirty(self, *names):
+        """
+        Mark the zones to be re-rendered, e.g. when something else
+        was drawn over them. All the zones, if no name is given.
+        """
+
+        for name in names or self.zones:
+            self.zones[name].dirty = True
+
+    def compose(self):
+        """
+        Re-render the due zones into the display buffer.
+        Return the number of the re-rendered zones.
+        """
+
+        now = ticks_ms()
+        rendered = 0
+
+        for zone in self.zones.values():
+            if zone.is_due(now):
+                zone.compose(display.buffer, self._scratch, self._scratch_fb,
+                    now)
+                rendered += 1
+
+        return rendered
+
+    def ms_to_next_due(self):
+        """
+        Get the time until a zone has to be re-rendered periodically,
+        None if none has to.
+        """
+
+        now = ticks_ms()
+        next_due = None
+
+        for zone in self.zones.values():
+            ms = zone.ms_to_due(now)
+            if ms is not None and (next_due is None or ms < next_due):
+                next_due = ms
+
+        return next_due
+
+def halves_compositor():
+    """
+    Get a compositor with the display split into the left and right half
+    at x = HALF_WIDTH, e.g. the sides of the score or the hours
+    and minutes. When one of them changes, only its half is re-rendered.
+    The delimiters in the middle are drawn by both halves.
+    """
+
+    compositor = Compositor()
+    compositor.add(Zone(const.LEFT_ZONE, 0, 0, display.HALF_WIDTH,
+        display.HEIGHT))
+    compositor.add(Zone(const.RIGHT_ZONE, display.HALF_WIDTH, 0,
+        display.HALF_WIDTH, display.HEIGHT))
+
+    return compositor
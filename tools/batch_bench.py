@@ -0,0 +1,165 @@
+# Author: Marek Jankech
+
+"""
+Initial sync benchmark.
+
+Replays the six commands the remote control sends on connecting,
+once as separate lines and once as a single BATCH line, through
+a Dispatcher with the value parsers and validators of the App.
+The batch is handled the way App.handle_batch_cmd does it: split,
+all the commands validated, then all of them dispatched.
+Only the parsing is measured, nothing is applied, so the viewer
+wake-ups are counted instead: every separate command which changes
+what's shown wakes the viewer, the batch wakes it once at its end.
+Run it from the repository root, on the device or on a host:
+
+	micropython tools/batch_bench.py
+	python3 tools/batch_bench.py
+
+It prints the processing time, the viewer wake-ups and the bytes
+on the wire with their airtime at the UART baud rate of the BLE module.
+"""
+
+import sys
+
+ROOT = __file__.rsplit("/", 2)[0] if __file__.count("/") >= 2 else "."
+sys.path.insert(0, ROOT)
+
+import app.constants as const
+from app.protocol import Dispatcher, parse_ints, parse_bool, check_datetime
+
+ROUNDS = 1000
+
+# Start bit, 8 data bits and stop bit
+BITS_PER_BYTE = 10
+
+LINE_END = b"\r\n"
+
+SYNC = (
+	b"SET_TIME=3 17.10.2026 14:05:09",
+	b"SET_BRIGHT=7",
+	b"SET_SHOW_SCORE=1",
+	b"SET_SHOW_TIME=1",
+	b"SET_SCROLL=0",
+	b"SET_SCORE=12:7T1729170000000"
+)
+
+try:
+	from time import ticks_us, ticks_diff
+except ImportError:
+	from time import perf_counter_ns
+
+	def ticks_us():
+		return perf_counter_ns() // 1000
+
+	def ticks_diff(end, start):
+		return end - start
+
+
+class Counter:
+	def __init__(self):
+		self.wakeups = 0
+
+def parse_time(value):
+	(weekday, day, month, year, hour, minute, second) = parse_ints(value,
+		" .. ::")
+	check_datetime(year, month, day, weekday, hour, minute, second)
+
+def parse_bool_value(value):
+	if parse_bool(value) is None:
+		raise ValueError("Invalid bool value")
+
+def new_dispatcher(counter: Counter):
+	"""
+	Dispatcher with the parsers of the App as the validators.
+	The handlers parse the value again, like the App handlers do,
+	and count the viewer wake-ups of the commands changing the view.
+	"""
+
+	dispatcher = Dispatcher()
+	score_delimiters = (const.SET_SCORE_CMD_SCORE_DELIMITER
+		+ const.TIMESTAMP_DELIMITER)
+
+	def parse_score(value):
+		parse_ints(value, score_delimiters)
+
+	def waking(parse):
+		def handle(value):
+			parse(value)
+			counter.wakeups += 1
+		return handle
+
+	for (token, parse, wakes) in (
+			(const.SET_TIME_CMD_PREFIX, parse_time, True),
+			(const.SET_BRIGHTNESS_CMD_PREFIX, parse_ints, False),
+			(const.SET_SHOW_SCORE_CMD_PREFIX, parse_bool_value, True),
+			(const.SET_SHOW_TIME_CMD_PREFIX, parse_bool_value, True),
+			(const.SET_SCROLL_CMD_PREFIX, parse_bool_value, True),
+			(const.SET_SCORE_CMD_PREFIX, parse_score, True)):
+		dispatcher.register(token, waking(parse) if wakes else parse, parse)
+
+	return dispatcher
+
+def handle_lines(dispatcher, lines):
+	for line in lines:
+		dispatcher.dispatch(line)
+
+def handle_batch(dispatcher, counter, line):
+	commands = [cmd for cmd in line[len(const.BATCH_CMD_PREFIX):].split(
+		const.BATCH_CMD_DELIMITER.encode("ascii")) if cmd]
+
+	for cmd in commands:
+		dispatcher.validate(cmd)
+
+	# The viewer is stopped for the batch, its commands don't wake it
+	wakeups = counter.wakeups
+	for cmd in commands:
+		dispatcher.dispatch(cmd)
+	counter.wakeups = wakeups + 1
+
+def bench(handle):
+	"""Get the mean time in us of one sync."""
+
+	handle()
+
+	start = ticks_us()
+	for _ in range(ROUNDS):
+		handle()
+
+	return ticks_diff(ticks_us(), start) / ROUNDS
+
+def airtime_ms(nbytes):
+	return nbytes * BITS_PER_BYTE * 1000 / const.BLE_UART_BAUD
+
+def report(name, us, wakeups, sent, received):
+	print("{:<10} {:>9.1f} {:>8} {:>6} {:>6} {:>10.1f}".format(name, us,
+		wakeups, sent, received, airtime_ms(sent + received)))
+
+def main():
+	counter = Counter()
+	dispatcher = new_dispatcher(counter)
+
+	batch_line = (const.BATCH_CMD_PREFIX.encode("ascii")
+		+ const.BATCH_CMD_DELIMITER.encode("ascii").join(SYNC))
+
+	lines_us = bench(lambda: handle_lines(dispatcher, SYNC))
+	counter.wakeups = 0
+	handle_lines(dispatcher, SYNC)
+	lines_wakeups = counter.wakeups
+
+	batch_us = bench(lambda: handle_batch(dispatcher, counter, batch_line))
+	counter.wakeups = 0
+	handle_batch(dispatcher, counter, batch_line)
+	batch_wakeups = counter.wakeups
+
+	# The separate commands aren't answered, the batch by BATCH_ACK
+	lines_sent = sum(len(line) + len(LINE_END) for line in SYNC)
+	batch_sent = len(batch_line) + len(LINE_END)
+	batch_received = len(const.BATCH_ACK_CMD) + len(LINE_END)
+
+	print("{:<10} {:>9} {:>8} {:>6} {:>6} {:>10}".format("sync",
+		"us", "wake-ups", "sent B", "recv B", "airtime ms"))
+	report("lines", lines_us, lines_wakeups, lines_sent, 0)
+	report("batch", batch_us, batch_wakeups, batch_sent, batch_received)
+
+main()
@@ -0,0 +1,176 @@
+# Author: Marek Jankech
+
+"""
+Command dispatch benchmark.
+
+Compares the command line handling before the table-driven dispatcher,
+i.e. decoding the line, walking the startswith chain and parsing
+the value by slicing and splitting strings, with Dispatcher.dispatch
+and parsing straight from the buffer by parse_ints and parse_bool.
+Only the parsing is measured, nothing is applied. Run it from
+the repository root, on the device or on a host:
+
+	micropython tools/dispatch_bench.py
+	python3 tools/dispatch_bench.py
+
+It prints the mean time and the allocated memory per command.
+"""
+
+import sys
+
+ROOT = __file__.rsplit("/", 2)[0] if __file__.count("/") >= 2 else "."
+sys.path.insert(0, ROOT)
+
+import gc
+import app.constants as const
+from app.protocol import Dispatcher, parse_ints, parse_bool
+
+ROUNDS = 2000
+
+LINES = (
+	b"SET_SCORE=12:7T1729170000000",
+	b"SET_TIME=3 17.10.2026 14:05:09",
+	b"SET_BRIGHT=7",
+	b"SET_SHOW_SCORE=1",
+	b"SET_SHOW_TIME=0",
+	b"SET_SCROLL=1",
+	b"GET_SCORE",
+	b"GET_CONFIG",
+	b"SET_ALL_LEDS_ON=0",
+	b"DISCONNECT"
+)
+
+try:
+	from time import ticks_us, ticks_diff
+except ImportError:
+	from time import perf_counter_ns
+
+	def ticks_us():
+		return perf_counter_ns() // 1000
+
+	def ticks_diff(end, start):
+		return end - start
+
+def measure_mem(handle, line):
+	"""Get the memory allocated by one command, freed or not."""
+
+	if hasattr(gc, "mem_alloc"):
+		gc.collect()
+		gc.disable()
+		mem_before = gc.mem_alloc()
+		handle(line)
+		mem = gc.mem_alloc() - mem_before
+		gc.enable()
+		return mem
+
+	# Host: the peak of the traced memory, tracing slows the timing down,
+	# so it's on just for this
+	import tracemalloc
+	tracemalloc.start()
+	mem_before = tracemalloc.get_traced_memory()[0]
+	handle(line)
+	mem = tracemalloc.get_traced_memory()[1] - mem_before
+	tracemalloc.stop()
+	return mem
+
+
+def old_bool(cmd, prefix):
+	str_val = cmd[len(prefix):]
+	return True if str_val == "1" else False if str_val == "0" else None
+
+def old_handle(line):
+	"""The decode, startswith chain and string parsing replaced by Dispatcher."""
+
+	cmd = line.decode("ascii")
+
+	if cmd.startswith(const.SET_SCORE_CMD_PREFIX):
+		score_and_timestamp = cmd[len(const.SET_SCORE_CMD_PREFIX):]\
+			.split(const.TIMESTAMP_DELIMITER)
+		score = score_and_timestamp[0]\
+			.split(const.SET_SCORE_CMD_SCORE_DELIMITER)
+		return (int(score[0]), int(score[1]), int(score_and_timestamp[1]))
+	elif cmd.startswith(const.GET_SCORE_CMD):
+		return None
+	elif cmd.startswith(const.SET_TIME_CMD_PREFIX):
+		datetime_split = cmd[len(const.SET_TIME_CMD_PREFIX):].split()
+		day_month_year = datetime_split[1].split(".")
+		hour_minute_second = datetime_split[2].split(":")
+		return (int(datetime_split[0]),
+			int(day_month_year[0]), int(day_month_year[1]),
+			int(day_month_year[2]), int(hour_minute_second[0]),
+			int(hour_minute_second[1]), int(hour_minute_second[2]))
+	elif cmd.startswith(const.SET_BRIGHTNESS_CMD_PREFIX):
+		return int(cmd[len(const.SET_BRIGHTNESS_CMD_PREFIX):])
+	elif cmd.startswith(const.SET_SHOW_SCORE_CMD_PREFIX):
+		return old_bool(cmd, const.SET_SHOW_SCORE_CMD_PREFIX)
+	elif cmd.startswith(const.SET_SHOW_TIME_CMD_PREFIX):
+		return old_bool(cmd, const.SET_SHOW_TIME_CMD_PREFIX)
+	elif cmd.startswith(const.SET_SCROLL_CMD_PREFIX):
+		return old_bool(cmd, const.SET_SCROLL_CMD_PREFIX)
+	elif cmd.startswith(const.GET_CONFIG_CMD):
+		return None
+	elif cmd.startswith(const.PERSIST_CONFIG_CMD_PREFIX):
+		return None
+	elif cmd.startswith(const.SET_ALL_LEDS_ON_CMD_PREFIX):
+		return old_bool(cmd, const.SET_ALL_LEDS_ON_CMD_PREFIX)
+	elif cmd.startswith(const.DISCONNECT_CMD):
+		return None
+
+def new_dispatcher():
+	"""Dispatcher parsing the values the way the App handlers do."""
+
+	dispatcher = Dispatcher()
+	score_delimiters = (const.SET_SCORE_CMD_SCORE_DELIMITER
+		+ const.TIMESTAMP_DELIMITER)
+
+	dispatcher.register(const.SET_SCORE_CMD_PREFIX,
+		lambda value: parse_ints(value, score_delimiters))
+	dispatcher.register(const.GET_SCORE_CMD, lambda value: None)
+	dispatcher.register(const.SET_TIME_CMD_PREFIX,
+		lambda value: parse_ints(value, " .. ::"))
+	dispatcher.register(const.SET_BRIGHTNESS_CMD_PREFIX, parse_ints)
+	dispatcher.register(const.SET_SHOW_SCORE_CMD_PREFIX, parse_bool)
+	dispatcher.register(const.SET_SHOW_TIME_CMD_PREFIX, parse_bool)
+	dispatcher.register(const.SET_SCROLL_CMD_PREFIX, parse_bool)
+	dispatcher.register(const.GET_CONFIG_CMD, lambda value: None)
+	dispatcher.register(const.PERSIST_CONFIG_CMD_PREFIX, lambda value: None)
+	dispatcher.register(const.SET_ALL_LEDS_ON_CMD_PREFIX, parse_bool)
+	dispatcher.register(const.DISCONNECT_CMD, lambda value: None)
+
+	return dispatcher
+
+def bench(handle, line):
+	"""Get the mean time in us and the memory allocated by one command."""
+
+	handle(line)
+	mem = measure_mem(handle, line)
+
+	start = ticks_us()
+	for _ in range(ROUNDS):
+		handle(line)
+	elapsed = ticks_diff(ticks_us(), start)
+
+	return (elapsed / ROUNDS, mem)
+
+def main():
+	dispatcher = new_dispatcher()
+	(old_total, new_total) = (0, 0)
+
+	print("{:<32} {:>16} {:>16}".format("command", "old us / B", "new us / B"))
+
+	for line in LINES:
+		if old_handle(line) is None and dispatcher.dispatch(line) is not None:
+			raise ValueError("Handled differently: {}".format(line))
+
+		(old_us, old_mem) = bench(old_handle, line)
+		(new_us, new_mem) = bench(dispatcher.dispatch, line)
+		old_total += old_us
+		new_total += new_us
+
+		print("{:<32} {:>9.2f} / {:<4} {:>9.2f} / {:<4}".format(
+			line.decode("ascii"), old_us, old_mem, new_us, new_mem))
+
+	print("Mean per command: old {:.2f} us, new {:.2f} us".format(
+		old_total / len(LINES), new_total / len(LINES)))
+
+main()
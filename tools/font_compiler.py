@@ -0,0 +1,192 @@
+# Author: Marek Jankech
+
+"""
+Offline font compiler.
+
+Rasterizes the line-defined fonts of app/font.py into packed MONO_HLSB
+bitmaps and writes them, together with the glyph metrics, as bytes
+constants into app/font_data.py. Frozen into the firmware, the constants
+stay in flash instead of being built in RAM at every start.
+
+Run it from the repository root after changing a font:
+
+	micropython tools/font_compiler.py
+
+It checks that every compiled glyph renders pixel-identical to its Char
+and prints the RAM and import time saved.
+"""
+
+import sys
+
+ROOT = __file__.rsplit("/", 2)[0] if __file__.count("/") >= 2 else "."
+sys.path.insert(0, ROOT)
+
+import gc
+import framebuf
+import app.font as mx_font
+from app.char import Char
+
+OUTPUT_FILE = ROOT + "/app/font_data.py"
+
+BYTES_PER_GLYPH = Char.WIDTH * Char.HEIGHT // 8
+
+# (constant name prefix, source font class)
+SOURCE_FONTS = (
+	("BIG_DIGIT", mx_font.BigDigit),
+	("MEDIUM_DIGIT", mx_font.MediumDigit),
+	("MEDIUM", mx_font.Medium)
+)
+
+try:
+	from time import ticks_us, ticks_diff
+except ImportError:
+	from time import perf_counter_ns
+
+	def ticks_us():
+		return perf_counter_ns() // 1000
+
+	def ticks_diff(end, start):
+		return end - start
+
+if hasattr(gc, "mem_alloc"):
+	mem_alloc = gc.mem_alloc
+else:
+	import tracemalloc
+	tracemalloc.start()
+
+	def mem_alloc():
+		return tracemalloc.get_traced_memory()[0]
+
+
+def glyphs_of(font):
+	"""Get (key, Char) pairs of the source font in a stable order."""
+
+	if hasattr(font, "digits"):
+		return list(enumerate(font.digits))
+	return list(font.chars.items())
+
+def rasterize(char: Char):
+	"""Rasterize the lines of a char into a MONO_HLSB bitmap."""
+
+	bitmap = bytearray(BYTES_PER_GLYPH)
+	points = []
+
+	for line in char.hlines:
+		points.extend((line.x + i, line.y) for i in range(line.width))
+	for line in char.vlines:
+		points.extend((line.x, line.y + i) for i in range(line.height))
+
+	for (x, y) in points:
+		if 0 <= x < Char.WIDTH and 0 <= y < Char.HEIGHT:
+			bitmap[y * Char.WIDTH // 8 + x // 8] |= 0x80 >> (x & 7)
+
+	return bitmap
+
+def bytes_literal(data, indent="\t"):
+	lines = []
+	for start in range(0, len(data), BYTES_PER_GLYPH):
+		chunk = data[start:start + BYTES_PER_GLYPH]
+		lines.append(indent + 'b"' + "".join("\\x%02x" % b for b in chunk) + '"')
+	return "(\n" + "\n".join(lines) + "\n)"
+
+def compile_font(prefix, font):
+	keys = []
+	bitmaps = bytearray()
+	widths = bytearray()
+	advances = bytearray()
+
+	for (key, char) in glyphs_of(font):
+		keys.append(key)
+		bitmaps.extend(rasterize(char))
+		widths.append(char.width)
+		advances.append(char.advance)
+
+	return "\n".join((
+		"{}_KEYS = {}".format(prefix, repr(tuple(keys))),
+		"{}_BITMAPS = {}".format(prefix, bytes_literal(bitmaps)),
+		"{}_WIDTHS = {}".format(prefix, repr(bytes(widths))),
+		"{}_ADVANCES = {}".format(prefix, repr(bytes(advances))),
+		""
+	))
+
+def write_module(sources):
+	with open(OUTPUT_FILE, "w") as f:
+		f.write("# Generated by tools/font_compiler.py from app/font.py. Do not edit.\n")
+		f.write("# Glyph bitmaps are MONO_HLSB, {} x {} points, {} bytes per glyph.\n"
+			.format(Char.WIDTH, Char.HEIGHT, BYTES_PER_GLYPH))
+		f.write("# Widths are the ink widths, advances include the spacing.\n")
+
+		for (prefix, font) in sources:
+			f.write("\n")
+			f.write(compile_font(prefix, font))
+
+def render_bytes(glyph):
+	buffer = bytearray(BYTES_PER_GLYPH)
+	fb = framebuf.FrameBuffer(buffer, Char.WIDTH, Char.HEIGHT, framebuf.MONO_HLSB)
+	glyph.render(fb)
+	return buffer
+
+def unload_font_data():
+	"""
+	Forget the font_data imported by app.font before it was written,
+	so the next import loads the written one.
+	"""
+
+	sys.modules.pop("app.font_data", None)
+
+	import app
+	if hasattr(app, "font_data"):
+		del app.font_data
+
+def load_compiled():
+	import app.font_data as font_data
+	return [mx_font.CompiledFont(font_data, prefix)
+		for (prefix, _) in SOURCE_FONTS]
+
+def check(sources, compiled_fonts):
+	"""Compare each compiled glyph with the render of its Char."""
+
+	mismatches = 0
+
+	for ((prefix, font), compiled) in zip(sources, compiled_fonts):
+		for (key, char) in glyphs_of(font):
+			if render_bytes(compiled.get(key)) != render_bytes(char):
+				print("Mismatch: {} {}".format(prefix, repr(key)))
+				mismatches += 1
+
+	return mismatches
+
+def measure(build):
+	gc.collect()
+	mem_before = mem_alloc()
+	start = ticks_us()
+
+	result = build()
+
+	elapsed = ticks_diff(ticks_us(), start)
+	gc.collect()
+	return (result, elapsed, mem_alloc() - mem_before)
+
+def main():
+	(sources, source_us, source_mem) = measure(lambda: [
+		(prefix, font_cls()) for (prefix, font_cls) in SOURCE_FONTS])
+
+	write_module(sources)
+	print("Written {}".format(OUTPUT_FILE))
+
+	# The measurement includes the import of the written font_data
+	unload_font_data()
+	(compiled_fonts, compiled_us, compiled_mem) = measure(load_compiled)
+
+	mismatches = check(sources, compiled_fonts)
+	if mismatches:
+		print("{} glyphs differ from their source!".format(mismatches))
+		sys.exit(1)
+	print("All compiled glyphs are pixel-identical to the source fonts.")
+
+	print("Source fonts: {} us, {} B of RAM".format(source_us, source_mem))
+	print("Compiled fonts: {} us, {} B of RAM".format(compiled_us, compiled_mem))
+	print("Saved: {} us, {} B of RAM (more, if font_data is frozen)"
+		.format(source_us - compiled_us, source_mem - compiled_mem))
+
+main()
@@ -0,0 +1,86 @@
+# Author: Marek Jankech
+
+"""
+Glyph render benchmark.
+
+Compares rendering the glyphs of the source fonts stroke by stroke,
+i.e. one hline/vline call per line, with the single blit of the cached
+bitmap done by Char.render. Run it from the repository root:
+
+	micropython tools/glyph_bench.py
+
+It prints the mean render time per glyph for each font.
+"""
+
+import sys
+
+ROOT = __file__.rsplit("/", 2)[0] if __file__.count("/") >= 2 else "."
+sys.path.insert(0, ROOT)
+
+import framebuf
+import app.font as mx_font
+from app.char import Char
+
+ROUNDS = 200
+
+SOURCE_FONTS = (
+	("BIG_DIGIT", mx_font.BigDigit),
+	("MEDIUM_DIGIT", mx_font.MediumDigit),
+	("MEDIUM", mx_font.Medium)
+)
+
+try:
+	from time import ticks_us, ticks_diff
+except ImportError:
+	from time import perf_counter_ns
+
+	def ticks_us():
+		return perf_counter_ns() // 1000
+
+	def ticks_diff(end, start):
+		return end - start
+
+
+def chars_of(font):
+	if hasattr(font, "digits"):
+		return list(font.digits)
+	return list(font.chars.values())
+
+def render_strokes(char: Char, fb):
+	"""Render the char the way it was done before the bitmap cache."""
+
+	for line in char.hlines:
+		line.render(fb)
+	for line in char.vlines:
+		line.render(fb)
+
+def render_blit(char: Char, fb):
+	char.render(fb)
+
+def bench(chars, render, fb):
+	start = ticks_us()
+
+	for _ in range(ROUNDS):
+		for char in chars:
+			render(char, fb)
+
+	return ticks_diff(ticks_us(), start) / (ROUNDS * len(chars))
+
+def main():
+	fb = framebuf.FrameBuffer(bytearray(Char.WIDTH * Char.HEIGHT // 8),
+		Char.WIDTH, Char.HEIGHT, framebuf.MONO_HLSB)
+
+	for (name, font_cls) in SOURCE_FONTS:
+		chars = chars_of(font_cls())
+
+		# Rasterize the bitmaps outside of the measurement
+		for char in chars:
+			char.bitmap()
+
+		strokes_us = bench(chars, render_strokes, fb)
+		blit_us = bench(chars, render_blit, fb)
+
+		print("{}: strokes {:.1f} us, blit {:.1f} us per glyph ({:.1f}x)"
+			.format(name, strokes_us, blit_us, strokes_us / blit_us))
+
+main()
@@ -0,0 +1,83 @@
+# Author: Marek Jankech
+
+"""
+Transition benchmark.
+
+Measures the mean time of one step of each transition effect, i.e. the
+combination of two frames, and plays each effect on the display paced
+by a FrameClock at the scroll frame rate. The display writes through
+a RecordingTransport, so no hardware is needed and the frame rate
+doesn't include the SPI transfers. Run it from the repository root,
+on the device or by the unix port of MicroPython:
+
+	micropython tools/transition_bench.py
+
+It prints the step time and the achieved frame rate with the dropped
+frames for each effect.
+"""
+
+import sys
+
+ROOT = __file__.rsplit("/", 2)[0] if __file__.count("/") >= 2 else "."
+sys.path.insert(0, ROOT)
+
+import uasyncio as asyncio
+import app.constants as const
+from app.display import Matrix
+from app.transport import RecordingTransport
+from app.frame_clock import FrameClock
+from app.transition import TRANSITIONS
+
+ROUNDS = 20
+PLAYS = 5
+
+display = Matrix(RecordingTransport(), const.INITIAL_BRIGHTNESS)
+
+try:
+	from time import ticks_us, ticks_diff
+except ImportError:
+	from time import perf_counter_ns
+
+	def ticks_us():
+		return perf_counter_ns() // 1000
+
+	def ticks_diff(end, start):
+		return end - start
+
+
+def bench_steps(transition, frame_from, frame_to):
+	out = bytearray(len(display.buffer))
+	start = ticks_us()
+
+	for _ in range(ROUNDS):
+		for step in range(1, transition.steps):
+			transition.combine(out, frame_from, frame_to, step)
+
+	return ticks_diff(ticks_us(), start) / (ROUNDS * (transition.steps - 1))
+
+async def bench_play(transition, frame_from, frame_to):
+	frame_clock = FrameClock(const.SCROLL_FPS)
+
+	for _ in range(PLAYS):
+		await transition.play(display, frame_from, frame_to,
+			frame_clock)
+
+	return frame_clock
+
+async def main():
+	asyncio.create_task(display.writer())
+
+	frame_from = bytes(b"\xaa" * len(display.buffer))
+	frame_to = bytes(b"\x55" * len(display.buffer))
+
+	for (name, factory) in TRANSITIONS.items():
+		transition = factory()
+
+		step_us = bench_steps(transition, frame_from, frame_to)
+		frame_clock = await bench_play(transition, frame_from, frame_to)
+
+		print("{}: {} steps, {:.1f} us per step, {:.1f} fps of {}, {} dropped"
+			.format(name, transition.steps, step_us, frame_clock.fps(),
+			const.SCROLL_FPS, frame_clock.dropped))
+
+asyncio.run(main())